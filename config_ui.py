@@ -1,13 +1,11 @@
 import json
-import numpy as np
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QPushButton, QColorDialog,
     QComboBox, QSpinBox, QFileDialog, QApplication, QHBoxLayout,
     QSlider, QTabWidget, QScrollArea
 )
 from PyQt6.QtGui import QColor, QFontDatabase
-from PyQt6.QtCore import Qt
-import pyqtgraph as pg
+from PyQt6.QtCore import Qt, pyqtSignal
 
 CONFIG_FILE = "config.json"
 
@@ -79,6 +77,9 @@ class ButtonConfigUI(QWidget):
         self.config[self.button_name]["size"] = [self.width_spin.value(), self.height_spin.value()]
 
 class ConfigUI(QWidget):
+    # Émis après écriture de config.json (fenêtre ouverte depuis le lecteur)
+    saved_signal = pyqtSignal(dict)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Configuration Interface")
@@ -418,6 +419,7 @@ class ConfigUI(QWidget):
             json.dump(self.config, f, indent=4)
 
         print("Configuration enregistrée.")
+        self.saved_signal.emit(self.config)
 
 if __name__ == "__main__":
     import sys
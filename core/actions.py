@@ -1,11 +1,16 @@
 import os
 import time
 import pygame
-from mutagen.mp3 import MP3
+from core.library import LibraryIndex, SUPPORTED_EXTENSIONS, default_index_path
+from core.seek_index import FileView
+from core.instrument import timed
 
-pygame.mixer.init()
+# Le mixer est initialisé par le programme principal : importer ce module
+# (par ex. dans les processus d'analyse) n'ouvre pas la sortie audio
 playlist = []
 current_index = -1
+# Chemin -> ligne dans la playlist, tenu à jour à chaque modification
+_row_of = {}
 
 # Temps en ms où la lecture a été mise en pause (ou position de départ)
 last_seek_position = 0
@@ -13,13 +18,153 @@ last_seek_position = 0
 # Timestamp (en secondes) du moment où la musique a été lancée/reprise
 play_start_time = None
 
-def load_playlist_from_folder(folder_path):
+# Fichier actuellement chargé dans le mixer, et vue partielle utilisée
+# pour un seek via l'index de trames (gardée en vie pendant la lecture)
+loaded_path = None
+_seek_view = None
+# Position (ms) dans la piste du début de cette vue : le mixer compte à partir de là
+_view_base_ms = 0
+# Vrai entre pause_music et la reprise : le mixer reprend avec unpause()
+_paused = False
+
+# Piste mise en file d'attente du mixer pour un enchaînement sans blanc
+queued_index = -1
+
+# Index persistant des métadonnées (durée, tags...) de la bibliothèque
+library = None
+
+# Volume du curseur et correction de loudness de la piste chargée ;
+# le mixer reçoit leur produit
+_volume = 1.0
+_track_gain = 1.0
+# Niveau visé en LUFS (fixé par le programme principal), None pour désactiver
+loudness_target = None
+
+def init_audio():
+    """Ouvre la sortie audio une seule fois (différé après l'affichage de la fenêtre)."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+
+def get_library(folder_path=None):
+    global library
+    if library is None:
+        if folder_path is None:
+            folder_path = os.path.join(os.getcwd(), "assets", "music")
+        library = LibraryIndex(default_index_path(folder_path))
+    return library
+
+def load_playlist_from_folder(folder_path, scan=True):
+    """scan=False : l'index sera mis à jour ailleurs (LibraryScanner)."""
     global playlist, current_index
     playlist.clear()
+    _row_of.clear()
     current_index = -1
     for filename in os.listdir(folder_path):
-        if filename.lower().endswith(('.mp3', '.wav', '.ogg')):
-            playlist.append(os.path.join(folder_path, filename))
+        if filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            path = os.path.join(folder_path, filename)
+            _row_of[path] = len(playlist)
+            playlist.append(path)
+    if scan:
+        get_library(folder_path).scan(playlist)
+
+def load_playlist_snapshot(paths):
+    """
+    Remplit la playlist depuis un instantané, sans lire le dossier ni
+    l'index : le contenu réel est synchronisé ensuite.
+    """
+    global current_index
+    playlist.clear()
+    _row_of.clear()
+    current_index = -1
+    for path in paths:
+        if path not in _row_of:
+            _row_of[path] = len(playlist)
+            playlist.append(path)
+
+def index_of(path):
+    """Ligne de la piste dans la playlist en temps constant, -1 si absente."""
+    return _row_of.get(path, -1)
+
+def add_track(path, scan=True):
+    """
+    Ajoute une piste à la playlist (mise à jour incrémentale, sans
+    rescanner le dossier). Retourne son index.
+    """
+    if scan:
+        get_library().scan([path], prune=False)
+    row = _row_of.get(path)
+    if row is not None:
+        return row
+    _row_of[path] = len(playlist)
+    playlist.append(path)
+    return len(playlist) - 1
+
+def remove_track(path):
+    """
+    Retire une piste ; l'index courant suit. Si c'est la piste en cours,
+    le mixer est arrêté et l'index passe à -1 : à l'appelant d'en choisir
+    une autre. La piste en file du mixer suit aussi ; si c'est elle qui
+    est retirée, queued_index passe à -1 et la file est à refaire
+    (pygame ne sait pas la vider). Retourne l'ancien index ou -1.
+    """
+    global current_index, loaded_path, queued_index
+    get_library().remove(path)
+    i = _row_of.pop(path, -1)
+    if i < 0:
+        return -1
+    del playlist[i]
+    for row in range(i, len(playlist)):
+        _row_of[playlist[row]] = row
+    if i < queued_index:
+        queued_index -= 1
+    elif i == queued_index:
+        queued_index = -1
+    if i < current_index:
+        current_index -= 1
+    elif i == current_index:
+        current_index = -1
+        # Le mixer ne doit pas continuer à lire un fichier sans index
+        if pygame.mixer.get_init():
+            stop_music()
+        loaded_path = None
+        _close_seek_view()
+    return i
+
+def rename_track(old_path, new_path):
+    """Renomme une piste sur place. Retourne son index ou -1."""
+    global loaded_path
+    get_library().remove(old_path)
+    get_library().scan([new_path], prune=False)
+    i = _row_of.pop(old_path, -1)
+    if i < 0:
+        return -1
+    playlist[i] = new_path
+    _row_of[new_path] = i
+    if loaded_path == old_path:
+        loaded_path = new_path
+    return i
+
+def sync_playlist_with_folder(folder_path, scan=True):
+    """
+    Aligne la playlist sur le contenu du dossier sans perdre la piste
+    courante. Retourne (ajoutés, supprimés). Si le dossier est illisible
+    (supprimé, déplacé), la playlist est gardée telle quelle.
+    """
+    try:
+        names = os.listdir(folder_path)
+    except OSError:
+        return [], []
+    on_disk = {
+        os.path.join(folder_path, f) for f in names
+        if f.lower().endswith(SUPPORTED_EXTENSIONS)
+    }
+    removed = [p for p in playlist if p not in on_disk]
+    added = sorted(p for p in on_disk if p not in _row_of)
+    for path in removed:
+        remove_track(path)
+    for path in added:
+        add_track(path, scan)
+    return added, removed
 
 def get_current_index():
     global current_index
@@ -38,35 +183,73 @@ def load_track_by_index(index):
         current_index = index
         last_seek_position = 0
         play_start_time = None
-        pygame.mixer.music.load(playlist[index])
+        load_track_file(playlist[index])
+
+@timed("track.mixer_load")
+def load_track_file(path):
+    # Chargement seul, sans toucher à l'index courant (utilisé par le TrackLoader)
+    global loaded_path, queued_index, _paused
+    pygame.mixer.music.load(path)
+    loaded_path = path
+    queued_index = -1
+    _paused = False
+    _close_seek_view()
+    refresh_track_gain()
+
+def _close_seek_view():
+    global _seek_view, _view_base_ms
+    if _seek_view is not None:
+        _seek_view.close()
+        _seek_view = None
+    _view_base_ms = 0
+
+def _reload_full_track():
+    # Une vue partielle ne peut ni revenir avant son début ni boucler sur
+    # toute la piste : on recharge le fichier complet
+    if _seek_view is not None and current_index != -1:
+        load_track_file(playlist[current_index])
+
+def _mixer_start(ms):
+    """Position absolue (ms) -> argument start de play(), relatif à la vue chargée."""
+    return max(0, ms - _view_base_ms) / 1000
 
 def play_music():
-    global play_start_time
+    global play_start_time, _paused
     if current_index == -1 and len(playlist) > 0:
         load_track_by_index(0)
-    pygame.mixer.music.play(start=last_seek_position / 1000)
+    if _paused:
+        pygame.mixer.music.unpause()
+    else:
+        if last_seek_position < _view_base_ms:
+            _reload_full_track()
+        pygame.mixer.music.play(start=_mixer_start(last_seek_position))
+    _paused = False
     play_start_time = time.time()
 
 def pause_music():
-    global last_seek_position, play_start_time
+    global last_seek_position, play_start_time, _paused
     if play_start_time is not None:
         elapsed_ms = int((time.time() - play_start_time) * 1000)
         last_seek_position += elapsed_ms
         play_start_time = None
+        _paused = True
     pygame.mixer.music.pause()
 
 def loop_music():
-    global play_start_time
+    global play_start_time, _paused
     if current_index == -1 and len(playlist) > 0:
         load_track_by_index(0)
+    _reload_full_track()
     pygame.mixer.music.play(loops=-1, start=last_seek_position / 1000)
+    _paused = False
     play_start_time = time.time()
 
 def stop_music():
-    global last_seek_position, play_start_time
+    global last_seek_position, play_start_time, _paused
     pygame.mixer.music.stop()
     last_seek_position = 0
     play_start_time = None
+    _paused = False
 
 def skip_track():
     global current_index
@@ -78,13 +261,34 @@ def skip_track():
     play_music()
 
 def rewind_track():
-    global last_seek_position, play_start_time
+    global last_seek_position, play_start_time, _paused
+    _reload_full_track()
     last_seek_position = 0
     play_start_time = time.time()
     pygame.mixer.music.play(start=0)
+    _paused = False
 
 def set_volume(vol):
-    pygame.mixer.music.set_volume(vol)
+    global _volume
+    _volume = vol
+    pygame.mixer.music.set_volume(_volume * _track_gain)
+
+def set_loudness_target(target):
+    global loudness_target
+    loudness_target = target
+    refresh_track_gain()
+
+def refresh_track_gain():
+    """Applique la correction de loudness mesurée pour la piste chargée (1 si inconnue)."""
+    global _track_gain
+    gain = 1.0
+    if loaded_path is not None and loudness_target is not None:
+        measured = get_library().get_loudness(loaded_path)
+        if measured is not None:
+            from core.loudness import gain_factor
+            gain = gain_factor(measured[0], measured[1], loudness_target)
+    _track_gain = gain
+    pygame.mixer.music.set_volume(_volume * _track_gain)
 
 def get_current_position_ms():
     global last_seek_position, play_start_time
@@ -96,19 +300,62 @@ def get_current_position_ms():
 def get_current_track_duration_ms():
     if current_index == -1 or not playlist:
         return 0
-    try:
-        audio = MP3(playlist[current_index])
-        return int(audio.info.length * 1000)
-    except Exception:
-        return 0
+    return get_library().duration_ms(playlist[current_index])
 
+def queue_track(index):
+    """Le mixer enchaînera sur cette piste dès la fin de la piste courante."""
+    global queued_index
+    if 0 <= index < len(playlist):
+        pygame.mixer.music.queue(playlist[index])
+        queued_index = index
+
+def advance_to_queued(duration_ms):
+    """
+    Le mixer est passé seul à la piste en file : recale l'index et la
+    position (le dépassement de la piste précédente est reporté).
+    """
+    global current_index, last_seek_position, play_start_time, queued_index, loaded_path, _paused
+    if queued_index == -1:
+        return
+    overflow = max(0, get_current_position_ms() - duration_ms)
+    current_index = queued_index
+    queued_index = -1
+    loaded_path = playlist[current_index]
+    _close_seek_view()
+    refresh_track_gain()
+    _paused = False
+    last_seek_position = overflow
+    play_start_time = time.time()
+
+@timed("seek")
 def seek_to_position(ms):
-    global last_seek_position, play_start_time
+    global last_seek_position, play_start_time, _seek_view, _view_base_ms, queued_index, _paused
     if current_index == -1:
         return
+    had_queue = queued_index != -1
+    # Recharger le mixer vide sa file d'attente
+    queued_index = -1
+    _paused = False
+    path = playlist[current_index]
     last_seek_position = ms
     play_start_time = time.time()
-    pygame.mixer.music.load(playlist[current_index])
+
+    index = get_library().get_seek_index(path, build=False)
+    if index is not None and index.offsets:
+        # Le décodeur repart directement de la trame indexée : le coût ne
+        # dépend plus de la position visée
+        offset, remainder_ms = index.locate(ms)
+        view = FileView(path, offset)
+        pygame.mixer.music.load(view, "mp3")
+        _close_seek_view()
+        _seek_view = view
+        _view_base_ms = ms - remainder_ms
+        pygame.mixer.music.play(start=remainder_ms / 1000)
+        return
+
+    # Sans index : on garde le fichier déjà chargé, pas de rechargement
+    if loaded_path != path or _seek_view is not None or had_queue:
+        load_track_file(path)
     pygame.mixer.music.play(start=ms / 1000)
 
 def get_current_track_name():
@@ -0,0 +1,233 @@
+import os
+import time
+import bisect
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QTimer, QEvent, Qt
+from PyQt6.QtGui import QImageReader, QPixmap
+from core.image_cache import cache_key, open_scaled_reader, fit_image
+
+# Mémoire maximale des images décodées d'une animation
+FRAME_BUDGET_MB = 32
+# Animations gardées décodées (même GIF sur plusieurs boutons, retour à un thème)
+MAX_FRAME_SETS = 8
+# Délai des GIF qui annoncent 0 ou 10 ms, comme les navigateurs
+DEFAULT_DELAY_MS = 100
+
+_frame_sets = OrderedDict()
+
+
+def is_animated(path):
+    reader = QImageReader(path)
+    return reader.supportsAnimation() and reader.imageCount() != 1
+
+
+class FrameSet:
+    """
+    Images d'un GIF, réduites à la taille d'affichage et décodées au fil
+    du premier tour seulement ; ensuite tout est servi depuis la mémoire.
+    Au-delà du budget, une image sur deux est abandonnée (son délai est
+    ajouté à la précédente) : l'animation reste fluide à durée égale.
+    Les images sont retrouvées par instant dans le cycle, pas par numéro :
+    une réduction en cours de lecture ne décale aucun widget.
+    """
+
+    def __init__(self, path, width, height, dpr=1.0, crop=False, budget_mb=FRAME_BUDGET_MB):
+        self.width = max(1, round(width * dpr))
+        self.height = max(1, round(height * dpr))
+        self.dpr = dpr
+        self.crop = crop
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.frames = []
+        # Début (ms dans le cycle) de chaque image
+        self.starts = []
+        self.complete = False
+        self._bytes = 0
+        self._stride = 1
+        self._decoded = 0
+        self._reader = open_scaled_reader(path, self.width, self.height)
+
+    def _decode_next(self):
+        image = self._reader.read()
+        if image.isNull():
+            self.complete = True
+            self._reader = None
+            return
+        delay = self._reader.nextImageDelay()
+        if delay <= 10:
+            delay = DEFAULT_DELAY_MS
+        index = self._decoded
+        self._decoded += 1
+        if index % self._stride and self.frames:
+            pixmap, previous = self.frames[-1]
+            self.frames[-1] = (pixmap, previous + delay)
+            return
+        pixmap = QPixmap.fromImage(fit_image(image, self.width, self.height, self.crop))
+        pixmap.setDevicePixelRatio(self.dpr)
+        self.starts.append(self.duration_ms())
+        self.frames.append((pixmap, delay))
+        self._bytes += pixmap.width() * pixmap.height() * 4
+        if self._bytes > self.budget and len(self.frames) > 1:
+            self._decimate()
+
+    def _decimate(self):
+        kept = []
+        for i in range(0, len(self.frames), 2):
+            pixmap, delay = self.frames[i]
+            if i + 1 < len(self.frames):
+                delay += self.frames[i + 1][1]
+            kept.append((pixmap, delay))
+        self.frames = kept
+        self.starts = self.starts[::2]
+        self._bytes = sum(p.width() * p.height() * 4 for p, _ in kept)
+        self._stride *= 2
+
+    def duration_ms(self):
+        """Durée des images décodées jusqu'ici (du cycle entier une fois complet)."""
+        if not self.frames:
+            return 0
+        return self.starts[-1] + self.frames[-1][1]
+
+    def frame_at(self, position_ms):
+        """
+        (pixmap, début, délai) de l'image affichée à position_ms du cycle,
+        décodée si besoin. Au-delà de la fin, le cycle reprend au début.
+        """
+        while not self.complete and position_ms >= self.duration_ms():
+            self._decode_next()
+        if not self.frames:
+            return None, 0, DEFAULT_DELAY_MS
+        if position_ms >= self.duration_ms():
+            position_ms = 0
+        i = bisect.bisect_right(self.starts, position_ms) - 1
+        pixmap, delay = self.frames[i]
+        return pixmap, self.starts[i], delay
+
+
+def get_frame_set(path, width, height, dpr=1.0, crop=False):
+    """Images partagées entre tous les widgets qui affichent le même GIF à la même taille."""
+    key = cache_key(path, width, height, dpr, crop)
+    frames = _frame_sets.get(key)
+    if frames is None:
+        frames = FrameSet(path, width, height, dpr, crop)
+        _frame_sets[key] = frames
+        while len(_frame_sets) > MAX_FRAME_SETS:
+            _frame_sets.popitem(last=False)
+    else:
+        _frame_sets.move_to_end(key)
+    return frames
+
+
+class AnimatedImage:
+    """
+    Position de lecture d'un widget dans un FrameSet, en ms dans le cycle ;
+    on_frame(pixmap) l'affiche.
+    """
+
+    def __init__(self, frames, on_frame):
+        self.frames = frames
+        self.on_frame = on_frame
+        self.position_ms = 0
+        self.started = 0.0
+        self.next_due = 0.0
+
+    def start(self, now):
+        pixmap, _, delay = self.frames.frame_at(0)
+        if pixmap is not None:
+            self.on_frame(pixmap)
+        self.position_ms = 0
+        self.started = now
+        self.next_due = now + delay / 1000
+
+    def advance(self, now):
+        # Fin de l'image affichée, même si le FrameSet a été réduit entre-temps
+        _, shown, delay = self.frames.frame_at(self.position_ms)
+        position = shown + delay
+        pixmap, start, delay = self.frames.frame_at(position)
+        if position >= self.frames.duration_ms():
+            position = 0
+        # Pendant le premier tour, l'image affichée a pu s'allonger (réduction)
+        if pixmap is not None and start != shown:
+            self.on_frame(pixmap)
+        self.position_ms = position
+        # Échéances cumulées (pas de dérive), sans rattraper un retard d'affichage
+        self.next_due = max(self.next_due + (start + delay - position) / 1000, now)
+
+
+class AnimationClock(QObject):
+    """
+    Horloge commune des animations de la fenêtre : un seul timer, réglé
+    sur la prochaine échéance. Arrêtée quand la fenêtre est réduite,
+    cachée ou n'est plus exposée (recouverte).
+    """
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.animations = []
+        self._handle = None
+        self._paused_at = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+        window.installEventFilter(self)
+
+    def add(self, animation):
+        animation.start(time.perf_counter())
+        self.animations.append(animation)
+        self.refresh()
+
+    def remove(self, animation):
+        if animation in self.animations:
+            self.animations.remove(animation)
+        self.refresh()
+
+    def is_visible(self):
+        if not self.window.isVisible() or self.window.isMinimized():
+            return False
+        handle = self.window.windowHandle()
+        return handle is None or handle.isExposed()
+
+    def refresh(self):
+        now = time.perf_counter()
+        if not self.animations:
+            # Plus rien à animer (thème sans GIF) : ce n'est pas une pause
+            self.timer.stop()
+            self._paused_at = None
+            return
+        if not self.is_visible():
+            self.timer.stop()
+            if self._paused_at is None:
+                self._paused_at = now
+            return
+        if self._paused_at is not None:
+            # Reprise là où l'animation s'était arrêtée ; celles ajoutées
+            # pendant la pause partent de leur propre début
+            paused = now - self._paused_at
+            for animation in self.animations:
+                if animation.started <= self._paused_at:
+                    animation.next_due += paused
+            self._paused_at = None
+        self._watch_exposure()
+        due = min(animation.next_due for animation in self.animations)
+        self.timer.start(max(1, int((due - now) * 1000)))
+
+    def _tick(self):
+        now = time.perf_counter()
+        for animation in list(self.animations):
+            if animation.next_due <= now + 0.001:
+                animation.advance(now)
+        self.refresh()
+
+    def _watch_exposure(self):
+        handle = self.window.windowHandle()
+        if handle is not None and handle is not self._handle:
+            handle.installEventFilter(self)
+            self._handle = handle
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Type.WindowStateChange, QEvent.Type.Show,
+                            QEvent.Type.Hide, QEvent.Type.Expose):
+            # Différé : l'état de la fenêtre n'est à jour qu'après l'événement
+            QTimer.singleShot(0, self.refresh)
+        return False
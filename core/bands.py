@@ -0,0 +1,136 @@
+import numpy as np
+
+# Plage de fréquences affichée par le visualiseur
+MIN_FREQ = 40.0
+MAX_FREQ = 16000.0
+# Dynamique affichée : une barre pleine = 0 dBFS, une barre vide = -DB_RANGE
+DB_RANGE = 60.0
+
+
+class BandMapper:
+    """
+    Opérateur pré-calculé qui passe d'une fenêtre d'échantillons à des
+    niveaux par barre sur une échelle de fréquences logarithmique.
+    Construit une seule fois pour un (num_bars, frame_rate, window_size)
+    donné ; le traitement d'une trame réutilise des tampons pré-alloués.
+
+    Les niveaux sont en dB ramenés à [0, 1] (0 = -DB_RANGE dBFS, 1 = 0 dBFS)
+    et ne sont pas bornés, pour pouvoir appliquer un gain ensuite.
+    """
+
+    def __init__(self, num_bars, frame_rate, window_size, min_freq=MIN_FREQ, max_freq=MAX_FREQ):
+        self.num_bars = num_bars
+        self.frame_rate = frame_rate
+        self.window_size = window_size
+
+        self.window = np.hanning(window_size).astype(np.float32)
+        num_bins = window_size // 2 + 1
+        self.starts, self.stop = self._log_edges(
+            num_bars, frame_rate, window_size, num_bins, min_freq, max_freq
+        )
+        # Amplitude FFT d'une sinusoïde pleine échelle avec la fenêtre de Hann
+        self.reference = float(self.window.sum()) / 2 * 32768.0
+
+        self._frame = np.zeros(window_size, dtype=np.float32)
+        self._mag = np.zeros(num_bins, dtype=np.float64)
+
+    @staticmethod
+    def _log_edges(num_bars, frame_rate, window_size, num_bins, min_freq, max_freq):
+        bin_hz = frame_rate / window_size
+        max_freq = min(max_freq, frame_rate / 2)
+        min_freq = min(min_freq, max_freq / 2)
+        freqs = np.geomspace(min_freq, max_freq, num_bars + 1)
+        edges = np.clip(np.rint(freqs / bin_hz).astype(np.intp), 1, num_bins - 1)
+        # Au moins un bin FFT par barre (les graves sont plus fins que la résolution)
+        for i in range(1, len(edges)):
+            if edges[i] <= edges[i - 1]:
+                edges[i] = edges[i - 1] + 1
+        edges = np.minimum(edges, num_bins)
+        stop = int(edges[-1])
+        starts = np.minimum(edges[:-1], stop - 1)
+        return starts, stop
+
+    def _to_levels(self, mag, out):
+        # Crête de chaque bande : une sinusoïde pleine échelle donne 1
+        np.maximum.reduceat(mag, self.starts, axis=-1, out=out)
+        np.multiply(out, 1.0 / self.reference, out=out)
+        np.maximum(out, 1e-10, out=out)
+        np.log10(out, out=out)
+        np.multiply(out, 20.0 / DB_RANGE, out=out)
+        np.add(out, 1.0, out=out)
+        return out
+
+    def process(self, samples, out):
+        """Niveaux d'une seule fenêtre, écrits dans out (taille num_bars)."""
+        n = min(len(samples), self.window_size)
+        self._frame[:n] = samples[:n]
+        self._frame[n:] = 0
+        np.multiply(self._frame, self.window, out=self._frame)
+        # np.fft n'accepte pas de tampon de sortie : seule allocation par trame
+        np.abs(np.fft.rfft(self._frame), out=self._mag)
+        return self._to_levels(self._mag[:self.stop], out)
+
+    def process_frames(self, frames):
+        """Version par lots pour l'analyse hors-ligne : (n, window) -> (n, num_bars)."""
+        mag = np.abs(np.fft.rfft(frames * self.window, axis=1))[:, :self.stop]
+        out = np.empty((len(frames), self.num_bars), dtype=np.float64)
+        return self._to_levels(mag, out)
+
+
+class BarSmoother:
+    """
+    Lissage temporel attaque/relâchement avec maintien des crêtes,
+    entièrement vectorisé et sans allocation par trame.
+    """
+
+    def __init__(self, num_bars, attack=0.7, decay=0.2, peak_fall=0.015):
+        self.attack = attack
+        self.decay = decay
+        self.peak_fall = peak_fall
+        self.values = np.zeros(num_bars)
+        self.peaks = np.zeros(num_bars)
+        self._target = np.zeros(num_bars)
+        self._diff = np.zeros(num_bars)
+        self._coef = np.zeros(num_bars)
+        self._rising = np.zeros(num_bars, dtype=bool)
+        # Coefficients pour une durée de trame donnée (1 = trame de référence)
+        self._steps = 1.0
+        self._attack_step = attack
+        self._decay_step = decay
+
+    def reset(self):
+        self.values.fill(0)
+        self.peaks.fill(0)
+
+    def update(self, levels, gain_offset=0.0, steps=1.0):
+        """
+        levels : niveaux bruts (BandMapper) ; gain_offset est ajouté avant
+        le bornage à [0, 1]. steps : durée écoulée en trames de référence
+        (50 ms), pour garder la même dynamique à toute cadence d'affichage.
+        Retourne self.values (mis à jour sur place).
+        """
+        np.add(levels, gain_offset, out=self._target)
+        np.clip(self._target, 0, 1, out=self._target)
+        self.step_towards(self._target, steps)
+        return self.values
+
+    def step_towards(self, target, steps=1.0):
+        if steps != self._steps:
+            self._steps = steps
+            self._attack_step = 1 - (1 - self.attack) ** steps
+            self._decay_step = 1 - (1 - self.decay) ** steps
+        np.subtract(target, self.values, out=self._diff)
+        np.greater(self._diff, 0, out=self._rising)
+        self._coef.fill(self._decay_step)
+        np.copyto(self._coef, self._attack_step, where=self._rising)
+        np.multiply(self._diff, self._coef, out=self._diff)
+        np.add(self.values, self._diff, out=self.values)
+
+        np.subtract(self.peaks, self.peak_fall * steps, out=self.peaks)
+        np.maximum(self.peaks, self.values, out=self.peaks)
+        return self.values
+
+
+def intensity_to_offset(intensity):
+    """Convertit l'intensité de config.json (gain linéaire) en décalage de niveau."""
+    return 20.0 * np.log10(max(float(intensity), 1e-3)) / DB_RANGE
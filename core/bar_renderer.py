@@ -0,0 +1,161 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtGui import QColor, QPainter, QLinearGradient, QBrush
+from PyQt6.QtCore import Qt, QRectF, QPointF
+from core import instrument
+
+# Hauteur des marqueurs de crête, en fraction de la hauteur totale
+PEAK_HEIGHT = 0.02
+
+
+class PaintedBars(QWidget):
+    """
+    Rendu des barres par un simple paintEvent : rectangles préalloués
+    (modifiés sur place à chaque trame) et un seul dégradé en cache pour
+    toute la rangée. Une trame = deux appels drawRects.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.num_bars = 0
+        self.bar_width = 0.8
+        self.color_start = QColor(0, 255, 0)
+        self.color_end = QColor(255, 0, 0)
+        self.peak_hold = True
+        self.values = None
+        self.peaks = None
+        self._rects = []
+        self._peak_rects = []
+        self._brush = None
+        self._geometry_key = None
+
+    def set_style(self, num_bars, bar_width, color_start, color_end, peak_hold):
+        self.num_bars = num_bars
+        self.bar_width = bar_width
+        self.color_start = QColor(*color_start)
+        self.color_end = QColor(*color_end)
+        self.peak_hold = peak_hold
+        self._rects = [QRectF() for _ in range(num_bars)]
+        self._peak_rects = [QRectF() for _ in range(num_bars)] if peak_hold else []
+        self._geometry_key = None
+        self.values = None
+        self.peaks = None
+        self.update()
+
+    def set_values(self, values, peaks=None):
+        self.values = values
+        self.peaks = peaks
+        self.update()
+
+    def _layout(self):
+        """Position horizontale des barres et dégradé, recalculés seulement au redimensionnement."""
+        key = (self.width(), self.height(), self.num_bars)
+        if key == self._geometry_key:
+            return
+        self._geometry_key = key
+        # Même cadrage que l'ancien graphe : centres en 0..n-1, largeur bar_width
+        span = max(self.num_bars - 1 + self.bar_width, 1e-6)
+        scale = self.width() / span
+        bar_w = self.bar_width * scale
+        for i, rect in enumerate(self._rects):
+            rect.setLeft(i * scale)
+            rect.setWidth(bar_w)
+        for i, rect in enumerate(self._peak_rects):
+            rect.setLeft(i * scale)
+            rect.setWidth(bar_w)
+        first = bar_w / 2
+        last = (self.num_bars - 1) * scale + bar_w / 2
+        gradient = QLinearGradient(QPointF(first, 0), QPointF(max(last, first + 1), 0))
+        gradient.setColorAt(0, self.color_start)
+        gradient.setColorAt(1, self.color_end)
+        self._brush = QBrush(gradient)
+
+    def paintEvent(self, event):
+        values = self.values
+        if values is None or not self._rects:
+            return
+        with instrument.span("visualizer.render"):
+            self._paint(values)
+
+    def _paint(self, values):
+        self._layout()
+        h = self.height()
+        for rect, v in zip(self._rects, values):
+            top = h * (1 - v)
+            rect.setTop(top)
+            rect.setBottom(h)
+
+        painter = QPainter(self)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self._brush)
+        painter.drawRects(self._rects)
+        if self._peak_rects and self.peaks is not None:
+            peak_h = max(1.0, h * PEAK_HEIGHT)
+            for rect, p in zip(self._peak_rects, self.peaks):
+                top = h * (1 - p) - peak_h
+                rect.setTop(top)
+                rect.setHeight(peak_h)
+            painter.drawRects(self._peak_rects)
+        painter.end()
+
+
+class PyqtgraphBars(QWidget):
+    """Ancien rendu pyqtgraph (BarGraphItem), importé seulement s'il est choisi."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        import pyqtgraph as pg
+        self.pg = pg
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.plot_widget = pg.PlotWidget()
+        self.plot_widget.setBackground(None)
+        self.plot_widget.setYRange(0, 1)
+        self.plot_widget.setMouseEnabled(x=False, y=False)
+        self.plot_widget.hideAxis('bottom')
+        self.plot_widget.hideAxis('left')
+        self.plot_widget.getPlotItem().layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.plot_widget)
+        self.bar_graph = None
+        self.peak_graph = None
+
+    def _generate_brushes(self, num_bars, color_start, color_end):
+        brushes = []
+        for i in range(num_bars):
+            ratio = i / max(num_bars - 1, 1)
+            r = int(color_start[0] * (1 - ratio) + color_end[0] * ratio)
+            g = int(color_start[1] * (1 - ratio) + color_end[1] * ratio)
+            b = int(color_start[2] * (1 - ratio) + color_end[2] * ratio)
+            brushes.append(self.pg.mkBrush(QColor(r, g, b)))
+        return brushes
+
+    def set_style(self, num_bars, bar_width, color_start, color_end, peak_hold):
+        pg = self.pg
+        x = list(range(num_bars))
+        zeros = [0.0] * num_bars
+        brushes = self._generate_brushes(num_bars, color_start, color_end)
+        self.plot_widget.clear()
+        self.bar_graph = pg.BarGraphItem(x=x, height=zeros, width=bar_width, brushes=brushes)
+        self.plot_widget.addItem(self.bar_graph)
+        self.peak_graph = None
+        if peak_hold:
+            self.peak_graph = pg.BarGraphItem(
+                x=x, y0=zeros, height=PEAK_HEIGHT, width=bar_width, brushes=brushes
+            )
+            self.plot_widget.addItem(self.peak_graph)
+
+    def set_values(self, values, peaks=None):
+        with instrument.span("visualizer.render"):
+            self.bar_graph.setOpts(height=values)
+            if self.peak_graph is not None and peaks is not None:
+                self.peak_graph.setOpts(y0=peaks)
+
+
+RENDERERS = {
+    "paint": PaintedBars,
+    "pyqtgraph": PyqtgraphBars,
+}
+
+
+def create_renderer(name, parent=None):
+    return RENDERERS.get(name, PaintedBars)(parent)
@@ -0,0 +1,343 @@
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+
+# Sans écran ni carte son : à fixer avant le premier import de Qt ou pygame
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+# 2 : load_audio.cold inclut l'analyse en arrière-plan
+# 3 : rss_peak_kb renommé rss_high_water_kb
+RESULTS_VERSION = 3
+FORMATS = ("wav", "mp3", "ogg")
+# Écart relatif de p50 au-delà duquel --compare signale une régression
+REGRESSION_THRESHOLD = 0.10
+
+_ENCODERS = {
+    "mp3": ["-codec:a", "libmp3lame", "-b:a", "192k"],
+    "ogg": ["-codec:a", "libvorbis", "-q:a", "5"],
+}
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# === bibliothèque synthétique ==================
+
+def synth_track(seconds, rate, seed):
+    """Stéréo int16 : quelques partiels, une enveloppe rythmique et du bruit."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    signal = np.zeros_like(t)
+    for amplitude in (0.4, 0.2, 0.1):
+        signal += amplitude * np.sin(2 * np.pi * rng.uniform(60, 4000) * t)
+    signal *= 0.6 + 0.4 * np.sin(2 * np.pi * rng.uniform(0.5, 3.0) * t) ** 2
+    noise = rng.normal(0, 0.03, t.size)
+    stereo = np.stack([signal + noise, 0.8 * signal + noise], axis=1)
+    return (np.clip(stereo, -1, 1) * 0.8 * 32767).astype("<i2")
+
+
+def write_wav(path, pcm, rate):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(pcm.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+
+
+def available_formats(formats):
+    """Formats demandés réellement productibles (MP3/OGG passent par ffmpeg)."""
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    return [fmt for fmt in formats if fmt == "wav" or has_ffmpeg]
+
+
+def generate_library(folder, tracks, seconds, rate=44100, formats=("wav",), seed=0):
+    """Crée tracks fichiers dans folder, en alternant les formats ; retourne leurs chemins."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(tracks):
+        fmt = formats[i % len(formats)]
+        path = os.path.join(folder, f"synth_{i:04d}.{fmt}")
+        pcm = synth_track(seconds, rate, seed + i)
+        if fmt == "wav":
+            write_wav(path, pcm, rate)
+        else:
+            tmp = path + ".wav"
+            write_wav(tmp, pcm, rate)
+            subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", tmp,
+                            *_ENCODERS[fmt], path], check=True)
+            os.remove(tmp)
+        paths.append(path)
+    return paths
+
+
+# === mesures =============================
+
+def rss_high_water_kb():
+    """
+    Plus haut niveau de mémoire résidente atteint par le processus depuis
+    son lancement (None si indisponible, ex. Windows). Ce n'est pas le pic
+    d'un benchmark : la valeur ne redescend jamais et inclut les précédents.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sur macOS, kilo-octets ailleurs
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def measure(fn, iterations, warmup=0):
+    """Durée (s) de chaque appel fn(i)."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    clock = time.perf_counter
+    for i in range(iterations):
+        start = clock()
+        fn(i)
+        samples.append(clock() - start)
+    return samples
+
+
+def summarize(samples, items_per_call=1, unit="appels"):
+    data = np.asarray(samples) * 1000
+    total = float(data.sum()) / 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(data.mean()),
+        "p50_ms": float(np.percentile(data, 50)),
+        "p90_ms": float(np.percentile(data, 90)),
+        "p99_ms": float(np.percentile(data, 99)),
+        "max_ms": float(data.max()),
+        "throughput": len(samples) * items_per_call / total if total > 0 else None,
+        "throughput_unit": f"{unit}/s",
+        "rss_high_water_kb": rss_high_water_kb(),
+    }
+
+
+def wait_background(baseline, timeout=600):
+    """Attend la fin des analyses lancées en arrière-plan (spectre, forme d'onde)."""
+    deadline = time.monotonic() + timeout
+    while threading.active_count() > baseline and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+# === chemins chauds ========================
+
+def bench_load_playlist(folder, repeat):
+    from core import actions
+    from core.library import default_index_path
+    index_path = default_index_path(folder)
+
+    def cold(_):
+        # Index vide : chaque fichier est sondé
+        if actions.library is not None:
+            actions.library.close()
+        actions.library = None
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        actions.load_playlist_from_folder(folder)
+
+    def warm(_):
+        actions.load_playlist_from_folder(folder)
+
+    tracks = len(os.listdir(folder))
+    results = {"load_playlist_from_folder.cold": summarize(measure(cold, repeat), tracks, "pistes")}
+    results["load_playlist_from_folder.warm"] = summarize(measure(warm, repeat, warmup=1), tracks, "pistes")
+    return results
+
+
+def bench_duration(iterations):
+    from core import actions
+    n = len(actions.playlist)
+
+    def call(i):
+        actions.current_index = i % n
+        actions.get_current_track_duration_ms()
+
+    return {"get_current_track_duration_ms": summarize(measure(call, iterations, warmup=n))}
+
+
+def bench_visualizer(paths, num_bars, frames, track_ms):
+    from core import stream_decoder
+    from core.visualizer import AudioVisualizer, PreparedAudio
+    from core.spectrum_cache import HOP_MS
+
+    visualizer = AudioVisualizer()
+    visualizer.configure({"visualizer": {"num_bars": num_bars}})
+    results = {}
+    baseline = threading.active_count()
+
+    def cold(i):
+        # Premier chargement : ni spectre en cache ni forme d'onde. L'analyse
+        # tourne en arrière-plan : on attend sa fin pour mesurer tout le coût
+        visualizer.load_audio(paths[i])
+        # Le décodeur en continu compterait comme une analyse en cours
+        visualizer._close_stream()
+        wait_background(baseline)
+
+    results["load_audio.cold"] = summarize(measure(cold, len(paths)))
+    results["load_audio.warm"] = summarize(measure(lambda i: visualizer.load_audio(paths[i]), len(paths)))
+
+    def frame(i):
+        # Lecture continue, qui reboucle au début de la piste
+        visualizer.update_visualizer((i * HOP_MS) % track_ms, 1.0)
+
+    visualizer.load_audio(paths[0])
+    results["update_visualizer.cached"] = summarize(measure(frame, frames, warmup=10))
+
+    # Rendu en direct : le spectre est retiré après installation de la piste
+    if stream_decoder.ffmpeg_available():
+        prepared = PreparedAudio(paths[0], num_bars, None, stream_decoder.StreamingDecoder(paths[0]), None)
+    else:
+        from pydub import AudioSegment
+        prepared = PreparedAudio(paths[0], num_bars, None, None, AudioSegment.from_file(paths[0]))
+    visualizer.attach_audio(prepared)
+    visualizer.spectrum = None
+    results["update_visualizer.live"] = summarize(measure(frame, frames, warmup=10))
+    visualizer._close_stream()
+    return results
+
+
+def bench_update_progress(app, iterations, timeout=60):
+    from main import MusicApp
+    window = MusicApp()
+    deadline = time.monotonic() + timeout
+    # Démarrage complet : premier affichage, puis threads et bibliothèque
+    while (window.loader is None or window._loading) and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    if window.loader is None:
+        window.finish_startup()
+    # Ses processus d'analyse fausseraient les mesures
+    window.loudness_scanner.stop()
+    window.on_toggle_play_pause()
+    results = {"MusicApp.update_progress": summarize(
+        measure(lambda i: window.update_progress(), iterations, warmup=20))}
+    window.close()
+    return results
+
+
+# === comparaison ===========================
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Lignes de comparaison des p50 ; le second élément indique une régression."""
+    lines = []
+    regressed = False
+    if baseline.get("version") != current.get("version"):
+        lines.append(f"  (référence au format {baseline.get('version')}, mesures pas toutes comparables)")
+    for name, result in current["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if before is None:
+            lines.append(f"  {name:<36} (nouveau)")
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- régression"
+            regressed = True
+        elif ratio < 1 - threshold:
+            flag = "  (amélioration)"
+        lines.append(f"  {name:<36}{before['p50_ms']:10.3f} ->{result['p50_ms']:10.3f} ms"
+                     f"  x{ratio:.2f}{flag}")
+    return lines, regressed
+
+
+def main(argv=None):
+    # Mesures hors-ligne, sans écran ni sortie audio :
+    #   python -m core.benchmark [--tracks 50] [--seconds 30] [--output mesures.json]
+    #                            [--compare reference.json]
+    # Tout (bibliothèque synthétique, caches, index) est créé dans un dossier temporaire.
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins chauds du lecteur")
+    parser.add_argument("--tracks", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--formats", default=",".join(FORMATS),
+                        help="formats de la bibliothèque synthétique (mp3/ogg si ffmpeg est présent)")
+    parser.add_argument("--bars", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5, help="passes de chargement de la playlist")
+    parser.add_argument("--iterations", type=int, default=2000, help="appels des fonctions rapides")
+    parser.add_argument("--output", help="fichier JSON des résultats (sinon sortie standard)")
+    parser.add_argument("--compare", help="résultats de référence (JSON) à comparer")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--keep", action="store_true", help="garder le dossier de travail")
+    args = parser.parse_args(argv)
+
+    requested = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip() in FORMATS]
+    formats = available_formats(requested) or ["wav"]
+
+    if _REPO_ROOT not in sys.path:
+        sys.path.insert(0, _REPO_ROOT)
+    workdir = tempfile.mkdtemp(prefix="nyrvana-bench-")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QT_VERSION_STR
+        from core import actions
+
+        music_dir = os.path.join(workdir, "assets", "music")
+        start = time.perf_counter()
+        paths = generate_library(music_dir, args.tracks, args.seconds, formats=formats)
+        generation_s = time.perf_counter() - start
+
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        actions.init_audio()
+
+        benchmarks = {}
+        benchmarks.update(bench_load_playlist(music_dir, args.repeat))
+        benchmarks.update(bench_duration(args.iterations))
+        benchmarks.update(bench_visualizer(paths, args.bars, args.iterations, int(args.seconds * 1000)))
+        benchmarks.update(bench_update_progress(app, args.iterations))
+    finally:
+        os.chdir(previous_cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt": QT_VERSION_STR,
+            "tracks": args.tracks,
+            "seconds": args.seconds,
+            "formats": formats,
+            "formats_skipped": [fmt for fmt in requested if fmt not in formats],
+            "bars": args.bars,
+            "generation_s": generation_s,
+        },
+        "benchmarks": benchmarks,
+    }
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressed = compare(results, baseline, args.threshold)
+        print(f"Comparaison avec {args.compare} (p50) :", file=sys.stderr)
+        for line in lines:
+            print(line, file=sys.stderr)
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
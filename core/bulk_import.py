@@ -0,0 +1,239 @@
+import os
+import re
+import csv
+import sys
+import shutil
+import hashlib
+import argparse
+import threading
+from core.downloads import (
+    DownloadQueue, default_ydl_factory, STORAGE_MP3, STORAGE_NATIVE,
+    DONE, ERROR
+)
+from core.download_cache import DownloadCache, default_cache_path
+from core.library import SUPPORTED_EXTENSIONS
+
+DEFAULT_ARCHIVE = os.path.join("assets", "download_archive.txt")
+
+
+def read_queries(path):
+    """
+    Requêtes d'un fichier texte (une par ligne, '#' pour commenter) ou
+    CSV (colonne "query", sinon "artist" + "title", sinon la première).
+    Les doublons sont ignorés, l'ordre est conservé.
+    """
+    queries = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.reader(f))
+            if not rows:
+                return []
+            header = [c.strip().lower() for c in rows[0]]
+            if "query" in header:
+                col = header.index("query")
+                queries = [r[col] for r in rows[1:] if len(r) > col]
+            elif "artist" in header and "title" in header:
+                a, t = header.index("artist"), header.index("title")
+                queries = [f"{r[a]} {r[t]}" for r in rows[1:] if len(r) > max(a, t)]
+            else:
+                queries = [r[0] for r in rows if r]
+        else:
+            queries = [line for line in f if not line.lstrip().startswith("#")]
+
+    seen = set()
+    result = []
+    for q in queries:
+        q = q.strip()
+        if q and q not in seen:
+            seen.add(q)
+            result.append(q)
+    return result
+
+
+class Checkpoint:
+    """
+    Requêtes déjà terminées, ajoutées au fichier une par une : une
+    exécution interrompue reprend là où elle s'était arrêtée. Les
+    requêtes en erreur ne sont pas notées et seront retentées.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+
+    def mark_done(self, query):
+        with self._lock:
+            if query in self.done:
+                return
+            self.done.add(query)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(query + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+class LocalExtractor:
+    """
+    Remplaçant de YoutubeDL sans réseau : une recherche est résolue vers
+    le fichier audio de source_dir dont le nom contient le plus de mots
+    de la requête, puis copié selon 'outtmpl'. Les hooks et l'archive
+    ('download_archive', lignes "local <id>") se comportent comme ceux
+    de yt-dlp.
+    """
+
+    def __init__(self, opts, source_dir):
+        self.opts = opts
+        self.source_dir = source_dir
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _match(self, target):
+        if target.startswith("file://"):
+            path = target[len("file://"):]
+            return path if os.path.isfile(path) else None
+        query = set(_words(target.split(":", 1)[1] if target.startswith("ytsearch") else target))
+        best, best_score = None, 0
+        for name in sorted(os.listdir(self.source_dir)):
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            score = len(query & set(_words(os.path.splitext(name)[0])))
+            if score > best_score:
+                best, best_score = os.path.join(self.source_dir, name), score
+        return best
+
+    def _archived(self, entry):
+        archive = self.opts.get("download_archive")
+        if not archive or not os.path.exists(archive):
+            return False
+        with open(archive, encoding="utf-8") as f:
+            return any(line.strip() == entry for line in f)
+
+    def download(self, targets):
+        for target in targets:
+            source = self._match(target)
+            if source is None:
+                raise RuntimeError(f"ERROR: [local] aucun résultat pour {target!r}")
+            title, ext = os.path.splitext(os.path.basename(source))
+            video_id = hashlib.sha1(title.encode("utf-8")).hexdigest()[:11]
+            entry = f"local {video_id}"
+            match_filter = self.opts.get("match_filter")
+            if match_filter is not None and match_filter(
+                    {"_type": "video", "id": video_id, "title": title}, incomplete=False):
+                continue
+            if self._archived(entry):
+                continue
+
+            dest = self.opts["outtmpl"] % {"title": title, "ext": ext.lstrip(".")}
+            total = os.path.getsize(source)
+            for hook in self.opts.get("progress_hooks", []):
+                hook({"status": "downloading", "downloaded_bytes": 0, "total_bytes": total})
+            shutil.copyfile(source, dest + ".part")
+            os.replace(dest + ".part", dest)
+            for hook in self.opts.get("progress_hooks", []):
+                hook({"status": "finished", "filename": dest, "total_bytes": total})
+            for hook in self.opts.get("postprocessor_hooks", []):
+                hook({"status": "finished", "info_dict": {"id": video_id, "filepath": dest}})
+
+            archive = self.opts.get("download_archive")
+            if archive:
+                with open(archive, "a", encoding="utf-8") as f:
+                    f.write(entry + "\n")
+        return 0
+
+
+def bulk_import(queries, output_dir, checkpoint, archive=DEFAULT_ARCHIVE, workers=3,
+                retries=2, storage=STORAGE_MP3, ydl_factory=default_ydl_factory,
+                report=print, cache=None):
+    """
+    Télécharge toutes les requêtes non encore terminées avec la même
+    logique que l'interface (DownloadQueue). Retourne (ok, erreurs, déjà faites).
+    """
+    todo = [q for q in queries if q not in checkpoint.done]
+    skipped = len(queries) - len(todo)
+    if not todo:
+        return 0, 0, skipped
+
+    counts = {DONE: 0, ERROR: 0}
+    lock = threading.Lock()
+
+    def on_update(job):
+        if job.status == DONE:
+            checkpoint.mark_done(job.query)
+        if job.status in (DONE, ERROR):
+            with lock:
+                counts[job.status] += 1
+                n = counts[DONE] + counts[ERROR]
+            if job.status == DONE:
+                tag = "dup" if job.cached else "ok "
+                report(f"[{n}/{len(todo)}] {tag} {job.query}")
+            else:
+                report(f"[{n}/{len(todo)}] err {job.query}: {job.error}")
+
+    if archive:
+        os.makedirs(os.path.dirname(archive) or ".", exist_ok=True)
+    queue = DownloadQueue(
+        output_dir, workers=workers, retries=retries, ydl_factory=ydl_factory,
+        on_update=on_update, storage=storage, cache=cache,
+        extra_opts={"download_archive": archive} if archive else None,
+    )
+    try:
+        for query in todo:
+            queue.submit(query)
+        queue.wait()
+    finally:
+        # Ctrl+C : les jobs en cours sont annulés, le checkpoint est déjà à jour
+        queue.shutdown(cancel=True)
+    return counts[DONE], counts[ERROR], skipped
+
+
+def main(argv=None):
+    # Import sans interface :
+    #   python -m core.bulk_import requetes.txt [--workers 3] [--source dossier]
+    parser = argparse.ArgumentParser(description="Import en masse de musiques")
+    parser.add_argument("queries", help="fichier texte (une requête par ligne) ou CSV")
+    parser.add_argument("--output", default=os.path.join("assets", "music"))
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--storage", choices=(STORAGE_MP3, STORAGE_NATIVE), default=STORAGE_MP3)
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE,
+                        help="archive de téléchargement au format yt-dlp ('' pour désactiver)")
+    parser.add_argument("--checkpoint", help="par défaut <fichier de requêtes>.done")
+    parser.add_argument("--source", help="dossier local utilisé à la place de YouTube (hors-ligne)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ne pas consulter le cache requête -> vidéo -> fichier")
+    args = parser.parse_args(argv)
+
+    queries = read_queries(args.queries)
+    checkpoint = Checkpoint(args.checkpoint or args.queries + ".done")
+    if args.source:
+        factory = lambda opts: LocalExtractor(opts, args.source)
+    else:
+        factory = default_ydl_factory
+
+    cache = None if args.no_cache else DownloadCache(default_cache_path(args.output))
+    try:
+        ok, errors, skipped = bulk_import(
+            queries, args.output, checkpoint, args.archive or None, args.workers,
+            args.retries, args.storage, factory, cache=cache,
+        )
+    except KeyboardInterrupt:
+        print("interrompu, relancer la même commande pour reprendre")
+        return 130
+    print(f"{ok} téléchargées, {errors} en erreur, {skipped} déjà faites")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
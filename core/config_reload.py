@@ -0,0 +1,66 @@
+import os
+import json
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+# Un éditeur écrit souvent le fichier en plusieurs fois : on attend que ça se calme
+RELOAD_DELAY_MS = 200
+
+
+def changed_sections(old, new):
+    """Sections de premier niveau (window, buttons, visualizer...) qui diffèrent."""
+    keys = set(old) | set(new)
+    return {key for key in keys if old.get(key) != new.get(key)}
+
+
+class ConfigWatcher(QObject):
+    """
+    Surveille config.json et émet changed_signal(config) quand son contenu
+    a changé. Un fichier illisible (écriture en cours, JSON invalide) est
+    ignoré : la configuration en place reste active.
+    """
+    changed_signal = pyqtSignal(dict)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = os.path.abspath(path)
+        self.watcher = QFileSystemWatcher(self)
+        # Le dossier aussi : un remplacement atomique retire le fichier de la surveillance
+        self.watcher.addPath(os.path.dirname(self.path))
+        if os.path.isfile(self.path):
+            self.watcher.addPath(self.path)
+        self.watcher.fileChanged.connect(self._schedule)
+        self.watcher.directoryChanged.connect(self._schedule)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._reload)
+        self._mtime = self._current_mtime()
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _schedule(self, *_):
+        self._timer.start(RELOAD_DELAY_MS)
+
+    def _reload(self):
+        if os.path.isfile(self.path) and self.path not in self.watcher.files():
+            self.watcher.addPath(self.path)
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._mtime = mtime
+        if isinstance(config, dict):
+            self.changed_signal.emit(config)
+
+    def stop(self):
+        self._timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+
+# Lecture sans interface : pas de Qt, seulement pygame et l'index de la bibliothèque
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from core import actions
+from core.remote import default_socket_path
+
+# Enchaînement un peu avant la fin réelle, comme dans l'interface
+END_MARGIN_MS = 500
+# Réveil maximal de la boucle de fin de piste
+IDLE_POLL_S = 1.0
+
+
+def load_config(path="config.json"):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class PlaybackEngine:
+    """
+    Le moteur core.actions piloté par commandes. core.actions garde son
+    état dans des globales : tout passe donc par un seul verrou, que les
+    commandes arrivent de plusieurs clients ou de la boucle de fin de piste.
+    """
+
+    def __init__(self, music_dir, config=None):
+        self.music_dir = music_dir
+        self.config = config or {}
+        self.lock = threading.RLock()
+        self.is_playing = False
+        self.is_looping = False
+        self.volume = 0.7
+        self.commands = {
+            "status": self.status,
+            "playlist": self.playlist,
+            "play": self.play,
+            "pause": self.pause,
+            "toggle": self.toggle,
+            "seek": self.seek,
+            "next": self.next,
+            "prev": self.prev,
+            "select": self.select,
+            "volume": self.set_volume,
+            "loop": self.set_loop,
+            "rescan": self.rescan,
+        }
+
+    def start(self):
+        with self.lock:
+            actions.init_audio()
+            pb_cfg = self.config.get("playback", {})
+            if pb_cfg.get("normalize", True):
+                actions.set_loudness_target(pb_cfg.get("loudness_target", -18.0))
+            os.makedirs(self.music_dir, exist_ok=True)
+            actions.load_playlist_from_folder(self.music_dir)
+            if actions.playlist:
+                actions.load_track_by_index(0)
+            actions.set_volume(self.volume)
+
+    def handle(self, request):
+        """Une requête {"cmd": ..., arguments} -> réponse {"ok": ..., ...}."""
+        command = self.commands.get(request.get("cmd"))
+        if command is None:
+            return {"ok": False, "error": f"commande inconnue : {request.get('cmd')}"}
+        args = {k: v for k, v in request.items() if k != "cmd"}
+        with self.lock:
+            result = command(**args)
+        reply = {"ok": True}
+        if result:
+            reply.update(result)
+        return reply
+
+    # --- commandes ---
+
+    def status(self):
+        index = actions.get_current_index()
+        return {
+            "playing": self.is_playing,
+            "looping": self.is_looping,
+            "index": index,
+            "track": actions.get_current_track_name(),
+            "path": actions.playlist[index] if index >= 0 else None,
+            "position_ms": actions.get_current_position_ms() if index >= 0 else 0,
+            "duration_ms": actions.get_current_track_duration_ms(),
+            "volume": self.volume,
+            "count": len(actions.playlist),
+        }
+
+    def playlist(self):
+        return {"paths": list(actions.playlist), "index": actions.get_current_index()}
+
+    def play(self):
+        if self.is_playing or not actions.playlist:
+            return self.status()
+        if actions.get_current_index() == -1:
+            actions.load_track_by_index(0)
+        pos = actions.get_current_position_ms()
+        dur = actions.get_current_track_duration_ms()
+        if pos == 0 or pos >= dur:
+            actions.seek_to_position(0)
+        else:
+            actions.play_music()
+        self.is_playing = True
+        return self.status()
+
+    def pause(self):
+        if self.is_playing:
+            actions.pause_music()
+            self.is_playing = False
+        return self.status()
+
+    def toggle(self):
+        return self.pause() if self.is_playing else self.play()
+
+    def seek(self, ms):
+        dur = actions.get_current_track_duration_ms()
+        actions.seek_to_position(max(0, min(int(ms), dur)))
+        if not self.is_playing:
+            # seek_to_position relance le mixer : on reste en pause à la nouvelle position
+            actions.pause_music()
+        return self.status()
+
+    def select(self, index):
+        if not 0 <= index < len(actions.playlist):
+            raise IndexError(f"piste {index} hors de la playlist")
+        actions.load_track_by_index(index)
+        if self.is_playing:
+            actions.play_music()
+        return self.status()
+
+    def next(self):
+        if not actions.playlist:
+            return self.status()
+        return self.select((actions.get_current_index() + 1) % len(actions.playlist))
+
+    def prev(self):
+        if not actions.playlist:
+            return self.status()
+        return self.select((actions.get_current_index() - 1) % len(actions.playlist))
+
+    def set_volume(self, value):
+        self.volume = max(0.0, min(float(value), 1.0))
+        actions.set_volume(self.volume)
+        return self.status()
+
+    def set_loop(self, on=None):
+        self.is_looping = (not self.is_looping) if on is None else bool(on)
+        return self.status()
+
+    def rescan(self):
+        current = actions.get_current_index()
+        added, removed = actions.sync_playlist_with_folder(self.music_dir)
+        actions.get_library().scan(list(actions.playlist))
+        if current != -1 and actions.get_current_index() == -1:
+            # La piste en cours a été supprimée (et le mixer arrêté)
+            if actions.playlist:
+                self.select(min(current, len(actions.playlist) - 1))
+            else:
+                self.is_playing = False
+        return {"added": len(added), "removed": len(removed)}
+
+    # --- fin de piste ---
+
+    def tick(self):
+        """Enchaîne en fin de piste ; retourne le délai (s) avant le prochain contrôle."""
+        with self.lock:
+            if not self.is_playing or actions.get_current_index() == -1:
+                return IDLE_POLL_S
+            pos = actions.get_current_position_ms()
+            dur = actions.get_current_track_duration_ms()
+            if dur <= 0:
+                return IDLE_POLL_S
+            remaining = dur - END_MARGIN_MS - pos
+            if remaining > 0:
+                return min(IDLE_POLL_S, max(0.02, remaining / 1000))
+            if self.is_looping:
+                actions.seek_to_position(0)
+            else:
+                self.next()
+            return 0.05
+
+    def shutdown(self):
+        with self.lock:
+            actions.stop_music()
+            self.is_playing = False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # Une requête JSON par ligne, une réponse JSON par ligne
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if request.get("cmd") == "quit":
+                    reply = {"ok": True}
+                    self.server.stop_event.set()
+                else:
+                    reply = self.server.engine.handle(request)
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def _socket_in_use(path):
+    """Vrai si un démon répond déjà ; un socket orphelin est supprimé."""
+    if not os.path.exists(path):
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        os.unlink(path)
+        return False
+    finally:
+        probe.close()
+
+
+def open_server(socket_path):
+    """
+    Réserve le socket avant d'ouvrir l'audio ou l'index : un second démon
+    s'arrête sans avoir rien joué ni modifié.
+    """
+    if _socket_in_use(socket_path):
+        raise RuntimeError(f"un lecteur écoute déjà sur {socket_path}")
+    server = socketserver.ThreadingUnixStreamServer(socket_path, _Handler)
+    os.chmod(socket_path, 0o600)
+    server.daemon_threads = True
+    return server
+
+
+def close_server(server, socket_path):
+    server.server_close()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+
+def serve(server, engine, socket_path):
+    """Sert les commandes jusqu'à "quit" ou SIGINT/SIGTERM."""
+    server.engine = engine
+    server.stop_event = threading.Event()
+    stop_event = server.stop_event
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop_event.set())
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        while not stop_event.wait(engine.tick()):
+            pass
+    finally:
+        server.shutdown()
+        engine.shutdown()
+        close_server(server, socket_path)
+
+
+def main(argv=None):
+    # Lecteur sans fenêtre, piloté par python -m core.remote :
+    #   python -m core.daemon [--socket chemin] [--music dossier] [--play]
+    if not hasattr(socket, "AF_UNIX"):
+        print("Mode démon indisponible : pas de sockets Unix sur ce système")
+        return 1
+    parser = argparse.ArgumentParser(description="Lecteur sans interface")
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument("--music", default=os.path.join(os.getcwd(), "assets", "music"))
+    parser.add_argument("--play", action="store_true", help="lancer la lecture au démarrage")
+    args = parser.parse_args(argv)
+
+    try:
+        server = open_server(args.socket)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    engine = PlaybackEngine(args.music, load_config())
+    try:
+        engine.start()
+    except BaseException:
+        close_server(server, args.socket)
+        raise
+    if args.play:
+        engine.handle({"cmd": "play"})
+    print(f"Lecteur en arrière-plan : {len(actions.playlist)} pistes, socket {args.socket}")
+    serve(server, engine, args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont
+from core import instrument
+
+HUD_INTERVAL_MS = 500
+
+
+class DebugHud(QLabel):
+    """
+    Surimpression des mesures (p50 / p99 / max en ms, nombre d'appels)
+    sur la fenêtre du lecteur. Rafraîchie deux fois par seconde, et
+    seulement quand elle est visible.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setFont(QFont("Monospace", 7))
+        self.setStyleSheet("color: #e0ffe0; background: rgba(0, 0, 0, 170); padding: 3px;")
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.set_shown(not self.isVisible())
+
+    def set_shown(self, shown):
+        if shown:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start(HUD_INTERVAL_MS)
+        else:
+            self.timer.stop()
+            self.hide()
+
+    def refresh(self):
+        lines = [f"{'':<18}{'p50':>6}{'p99':>7}{'max':>7}{'n':>7}"]
+        for name, s in instrument.snapshot().items():
+            lines.append(f"{name[:18]:<18}{s['p50_ms']:6.1f}{s['p99_ms']:7.1f}"
+                         f"{s['max_ms']:7.1f}{s['count']:7d}")
+        if len(lines) == 1:
+            lines.append("aucune mesure")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 4, 4)
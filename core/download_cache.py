@@ -0,0 +1,126 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+import unicodedata
+
+# Une recherche résolue reste valable ce temps-là (le résultat YouTube
+# d'une requête peut changer), l'association vidéo -> fichier n'expire pas
+SEARCH_TTL_DAYS = 30
+
+
+def default_cache_path(output_dir):
+    """assets/music -> assets/download_cache.sqlite"""
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    return os.path.join(parent, "download_cache.sqlite")
+
+
+def normalize_query(query):
+    """
+    Clé d'une requête : minuscules, sans accents ni ponctuation, espaces
+    réduits ("Forever  Lost!" et "forever lost" donnent la même clé).
+    Les URL sont gardées telles quelles.
+    """
+    query = query.strip()
+    if query.startswith(("http://", "https://", "file://")):
+        return query
+    text = unicodedata.normalize("NFKD", query)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+class DownloadCache:
+    """
+    Cache persistant (SQLite) requête normalisée -> identifiant vidéo ->
+    fichier local. Une requête déjà vue, ou une autre orthographe qui
+    mène à la même vidéo, ne déclenche ni téléchargement ni conversion.
+    Un fichier supprimé du disque sort du cache à la consultation.
+    """
+
+    def __init__(self, db_path, ttl_days=SEARCH_TTL_DAYS):
+        self.db_path = db_path
+        self.ttl = ttl_days * 86400
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS queries ("
+            " query TEXT PRIMARY KEY,"
+            " video_id TEXT NOT NULL,"
+            " resolved_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            " video_id TEXT PRIMARY KEY,"
+            " path TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS videos_path ON videos (path)")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def resolve(self, query):
+        """Identifiant vidéo d'une requête déjà résolue et pas expirée, sinon None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, resolved_at FROM queries WHERE query = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        if row is None:
+            return None
+        is_url = query.strip().startswith(("http://", "https://", "file://"))
+        if not is_url and time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def path_for(self, video_id):
+        """Fichier local de la vidéo, None s'il n'existe pas (ou plus)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(row[0]):
+                self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def lookup(self, query):
+        """Fichier local pour la requête, sans réseau : None si inconnu."""
+        video_id = self.resolve(query)
+        return self.path_for(video_id) if video_id is not None else None
+
+    def record_query(self, query, video_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?, ?)",
+                (normalize_query(query), video_id, time.time()),
+            )
+            self._conn.commit()
+
+    def record_file(self, video_id, path):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO videos VALUES (?, ?)",
+                (video_id, os.path.abspath(path)),
+            )
+            self._conn.commit()
+
+    def forget_path(self, path):
+        """Fichier supprimé de la bibliothèque."""
+        with self._lock:
+            self._conn.execute("DELETE FROM videos WHERE path = ?", (os.path.abspath(path),))
+            self._conn.commit()
+
+    def rename_path(self, old_path, new_path):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE videos SET path = ? WHERE path = ?",
+                (os.path.abspath(new_path), os.path.abspath(old_path)),
+            )
+            self._conn.commit()
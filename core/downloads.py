@@ -0,0 +1,330 @@
+import os
+import time
+import itertools
+import threading
+from collections import deque
+from core import instrument
+
+# États d'un téléchargement
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+
+class DownloadCancelled(Exception):
+    """Levée depuis le hook de progression pour interrompre yt-dlp."""
+
+
+def resolve_target(query):
+    """Une URL (http, https, file) est utilisée telle quelle, sinon recherche YouTube."""
+    if query.startswith(("http://", "https://", "file://")):
+        return query
+    return f"ytsearch1:{query}"
+
+
+# Modes de stockage : "mp3" réencode tout en MP3 192k, "native" garde le
+# flux audio d'origine (Opus/Vorbis) et se contente d'un remux sans réencodage
+STORAGE_MP3 = "mp3"
+STORAGE_NATIVE = "native"
+
+# Flux natifs lisibles par le mixer (SDL_mixer ne lit pas l'AAC des .m4a)
+NATIVE_FORMAT = 'bestaudio[acodec=opus]/bestaudio[acodec=vorbis]/bestaudio[ext=mp3]'
+
+
+def build_ydl_opts(output_dir, progress_hook=None, postprocessor_hook=None, storage=STORAGE_MP3,
+                   extra_opts=None):
+    if storage == STORAGE_NATIVE:
+        fmt = NATIVE_FORMAT
+        postprocessor = {
+            'key': 'FFmpegExtractAudio',
+            # "best" : copie du flux existant (-acodec copy), pas de transcodage
+            'preferredcodec': 'best',
+        }
+    else:
+        fmt = 'bestaudio/best'
+        postprocessor = {
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }
+    opts = {
+        'format': fmt,
+        'outtmpl': os.path.join(output_dir, '%(title)s.%(ext)s'),
+        'postprocessors': [postprocessor],
+        'quiet': True,
+        'noplaylist': True,
+        # Permet les sources locales (file://) pour travailler hors-ligne
+        'enable_file_urls': True,
+    }
+    if progress_hook is not None:
+        opts['progress_hooks'] = [progress_hook]
+    if postprocessor_hook is not None:
+        opts['postprocessor_hooks'] = [postprocessor_hook]
+    if extra_opts:
+        # Ex. 'download_archive' pour l'import en masse
+        opts.update(extra_opts)
+    return opts
+
+
+def default_ydl_factory(opts):
+    import yt_dlp
+    return yt_dlp.YoutubeDL(opts)
+
+
+def run_download(query, output_dir, ydl_factory=default_ydl_factory,
+                 progress_hook=None, postprocessor_hook=None, opts=None,
+                 storage=STORAGE_MP3, extra_opts=None, cache=None):
+    """
+    Télécharge une requête (recherche ou URL) dans output_dir et retourne
+    le chemin du fichier local quand il est connu.
+    ydl_factory(opts) doit retourner un objet compatible YoutubeDL
+    (gestionnaire de contexte avec download()) : on peut y brancher un
+    extracteur de remplacement pour travailler sans réseau.
+    En mode "native", si aucun flux lisible tel quel n'existe, on
+    retombe sur la conversion MP3.
+    Avec un DownloadCache, une requête connue retourne directement le
+    fichier existant, et une vidéo déjà présente n'est pas retéléchargée.
+    """
+    result = {}
+    if cache is not None:
+        cached = cache.lookup(query)
+        if cached is not None:
+            return cached
+
+    def match_filter(info, *, incomplete=False):
+        # Appelé par yt-dlp avant le téléchargement de chaque vidéo
+        if info.get('_type', 'video') not in ('video', 'url') or not info.get('id'):
+            return None
+        cache.record_query(query, info['id'])
+        existing = cache.path_for(info['id'])
+        if existing is not None:
+            result['path'] = existing
+            return "déjà dans la bibliothèque"
+        return None
+
+    stages = {}
+
+    def progress_stage(d):
+        # Transfert : du premier octet reçu à la fin du fichier
+        status = d.get('status')
+        if status == 'downloading' and 'transfer' not in stages:
+            stages['transfer'] = instrument.now_ns()
+        elif status == 'finished' and 'transfer' in stages:
+            instrument.record("download.transfer", stages.pop('transfer'), instrument.now_ns())
+        if progress_hook is not None:
+            progress_hook(d)
+
+    def pp_hook(d):
+        if instrument.enabled:
+            if d.get('status') == 'started':
+                stages['postprocess'] = instrument.now_ns()
+            elif d.get('status') == 'finished' and 'postprocess' in stages:
+                instrument.record("download.postprocess", stages.pop('postprocess'), instrument.now_ns())
+        if d.get('status') == 'finished':
+            info = d.get('info_dict', {})
+            if info.get('filepath'):
+                result['path'] = info['filepath']
+                if cache is not None and info.get('id'):
+                    cache.record_file(info['id'], info['filepath'])
+        if postprocessor_hook is not None:
+            postprocessor_hook(d)
+
+    def attempt(storage):
+        ydl_opts = opts
+        if ydl_opts is None:
+            hook = progress_stage if instrument.enabled else progress_hook
+            ydl_opts = build_ydl_opts(output_dir, hook, pp_hook, storage, extra_opts)
+        if cache is not None:
+            ydl_opts = dict(ydl_opts, match_filter=match_filter)
+        with instrument.span("download.job"), ydl_factory(ydl_opts) as ydl:
+            ydl.download([resolve_target(query)])
+        return result.get('path')
+
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        return attempt(storage)
+    except Exception as e:
+        if storage != STORAGE_NATIVE or "Requested format is not available" not in str(e):
+            raise
+    return attempt(STORAGE_MP3)
+
+
+class DownloadJob:
+    def __init__(self, job_id, query):
+        self.id = job_id
+        self.query = query
+        self.status = QUEUED
+        self.progress = 0.0
+        self.attempts = 0
+        self.error = ""
+        self.filename = ""
+        # Vrai si le fichier était déjà dans la bibliothèque
+        self.cached = False
+        self.cancel_event = threading.Event()
+
+
+class DownloadQueue:
+    """
+    File de téléchargements avec un nombre borné de workers. Chaque job a
+    sa progression (hooks yt-dlp), ses tentatives et peut être annulé.
+    on_update(job) est appelé depuis les threads workers à chaque
+    changement.
+    """
+
+    def __init__(self, output_dir='assets/music', workers=3, retries=2,
+                 ydl_factory=default_ydl_factory, on_update=None, retry_delay=1.0,
+                 storage=STORAGE_MP3, extra_opts=None, cache=None):
+        self.output_dir = output_dir
+        self.cache = cache
+        self.storage = storage
+        self.extra_opts = extra_opts
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.ydl_factory = ydl_factory
+        self.on_update = on_update
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, query):
+        with self._cond:
+            job = DownloadJob(next(self._ids), query)
+            self.jobs[job.id] = job
+            self._queue.append(job)
+            self._cond.notify()
+        self._notify(job)
+        return job
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.status in (DONE, ERROR, CANCELLED):
+            return
+        job.cancel_event.set()
+        with self._cond:
+            if job in self._queue:
+                self._queue.remove(job)
+                job.status = CANCELLED
+        if job.status == CANCELLED:
+            self._notify(job)
+
+    def retry(self, job_id):
+        """Remet en file un job en erreur ou annulé."""
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in (ERROR, CANCELLED):
+            return
+        with self._cond:
+            job.status = QUEUED
+            job.progress = 0.0
+            job.error = ""
+            job.attempts = 0
+            job.cancel_event.clear()
+            self._queue.append(job)
+            self._cond.notify()
+        self._notify(job)
+
+    def pending(self):
+        return [j for j in self.jobs.values() if j.status in (QUEUED, RUNNING)]
+
+    def wait(self, timeout=None):
+        """Attend que tous les jobs soient terminés (utile hors interface)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self, cancel=True):
+        with self._cond:
+            self._closed = True
+            if cancel:
+                for job in self._queue:
+                    job.status = CANCELLED
+                self._queue.clear()
+                for job in self.jobs.values():
+                    job.cancel_event.set()
+            self._cond.notify_all()
+
+    def _notify(self, job):
+        if self.on_update is not None:
+            self.on_update(job)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+                job = self._queue.popleft()
+                job.status = RUNNING
+            self._notify(job)
+            self._run(job)
+
+    def _run(self, job):
+        def progress_hook(d):
+            if job.cancel_event.is_set():
+                raise DownloadCancelled()
+            if d.get('status') == 'downloading':
+                total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                if total:
+                    job.progress = min(1.0, d.get('downloaded_bytes', 0) / total)
+                    self._notify(job)
+            elif d.get('status') == 'finished':
+                job.progress = 1.0
+                job.filename = d.get('filename', job.filename)
+                self._notify(job)
+
+        def postprocessor_hook(d):
+            if d.get('status') == 'finished':
+                job.filename = d.get('info_dict', {}).get('filepath', job.filename)
+
+        while True:
+            job.attempts += 1
+            job.filename = ""
+            try:
+                path = run_download(job.query, self.output_dir, self.ydl_factory,
+                                    progress_hook, postprocessor_hook, storage=self.storage,
+                                    extra_opts=self.extra_opts, cache=self.cache)
+                if path:
+                    # Aucun hook appelé : la vidéo était déjà là
+                    job.cached = not job.filename
+                    job.filename = path
+                job.status = DONE
+                job.progress = 1.0
+                break
+            except Exception as e:
+                if job.cancel_event.is_set() or _is_cancellation(e):
+                    job.status = CANCELLED
+                    break
+                job.error = str(e)
+                if job.attempts > self.retries:
+                    job.status = ERROR
+                    break
+                self._notify(job)
+                # Attente avant nouvelle tentative, interrompue par une annulation
+                if job.cancel_event.wait(self.retry_delay * job.attempts):
+                    job.status = CANCELLED
+                    break
+        self._notify(job)
+
+
+def _is_cancellation(error):
+    # yt-dlp peut envelopper l'exception levée par le hook
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if type(error).__name__ == "DownloadCancelled":
+            return True
+        exc_info = getattr(error, "exc_info", None)
+        error = exc_info[1] if exc_info else (error.__cause__ or error.__context__)
+    return False
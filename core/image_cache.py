@@ -0,0 +1,166 @@
+import os
+import hashlib
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QSize, QRect
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+# À incrémenter quand la façon de produire les images en cache change
+CACHE_VERSION = 1
+# Pixmaps décodés gardés en mémoire (fond et boutons de quelques thèmes)
+MEMORY_BUDGET_MB = 64
+# PNG gardés sur disque : les moins récemment utilisés partent au-delà
+DISK_BUDGET_MB = 32
+
+_shared = None
+
+
+def default_cache_dir():
+    return os.path.join(os.getcwd(), "assets", "cache", "images")
+
+
+def cache_key(path, width, height, dpr=1.0, crop=False):
+    """
+    Clé (chemin, mtime, taille cible, DPR) : une image modifiée sur disque
+    ou affichée à une autre taille donne une autre entrée.
+    """
+    st = os.stat(path)
+    raw = (f"{CACHE_VERSION}|{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+           f"|{width}x{height}@{dpr:g}|{'crop' if crop else 'expand'}")
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _expanded_size(source, target):
+    """Taille qui couvre target en gardant les proportions (KeepAspectRatioByExpanding)."""
+    return source.scaled(target, Qt.AspectRatioMode.KeepAspectRatioByExpanding)
+
+
+def open_scaled_reader(path, width, height):
+    """
+    QImageReader qui décode directement à la taille voulue : le lecteur
+    JPEG (et GIF) réduit pendant le décodage, la pleine résolution n'est
+    jamais en mémoire.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    source = reader.size()
+    if source.isValid():
+        scaled = _expanded_size(source, QSize(width, height))
+        if scaled.width() < source.width():
+            reader.setScaledSize(scaled)
+    return reader
+
+
+def fit_image(image, width, height, crop=False):
+    """Couvre width x height en gardant les proportions ; crop recadre au centre."""
+    target = QSize(width, height)
+    if image.size() != _expanded_size(image.size(), target):
+        image = image.scaled(target, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                             Qt.TransformationMode.SmoothTransformation)
+    if crop and image.size() != target:
+        x = (image.width() - width) // 2
+        y = (image.height() - height) // 2
+        image = image.copy(QRect(x, y, width, height))
+    return image
+
+
+def decode_scaled(path, width, height, crop=False):
+    image = open_scaled_reader(path, width, height).read()
+    if image.isNull():
+        return None
+    return fit_image(image, width, height, crop)
+
+
+class ImageCache:
+    """
+    Images de thème pré-redimensionnées : en mémoire (LRU borné en octets),
+    puis sur disque (PNG à la taille d'affichage), et seulement en dernier
+    recours décodées depuis la source. À utiliser depuis le thread graphique.
+    """
+
+    def __init__(self, cache_dir=None, budget_mb=MEMORY_BUDGET_MB, disk_budget_mb=DISK_BUDGET_MB):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.disk_budget = int(disk_budget_mb * 1024 * 1024)
+        self._pixmaps = OrderedDict()
+        self._bytes = 0
+
+    def pixmap(self, path, width, height, dpr=1.0, crop=False):
+        """
+        QPixmap de l'image à width x height (pixels logiques), ou None si
+        elle est illisible. Sans crop, l'image couvre la zone en gardant ses
+        proportions ; avec crop elle est recadrée au centre.
+        """
+        try:
+            key = cache_key(path, width, height, dpr, crop)
+        except OSError:
+            return None
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+
+        cached_path = os.path.join(self.cache_dir, key + ".png")
+        image = QImage(cached_path) if os.path.isfile(cached_path) else QImage()
+        if image.isNull():
+            image = decode_scaled(path, max(1, round(width * dpr)), max(1, round(height * dpr)), crop)
+            if image is None:
+                return None
+            self._save(image, cached_path)
+            self._trim_disk()
+        else:
+            # La date de modification sert d'ordre LRU pour _trim_disk
+            try:
+                os.utime(cached_path)
+            except OSError:
+                pass
+
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(dpr)
+        self._remember(key, pixmap)
+        return pixmap
+
+    def _save(self, image, cached_path):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError:
+            return
+        tmp = cached_path + ".tmp"
+        if image.save(tmp, "PNG"):
+            os.replace(tmp, cached_path)
+
+    def _trim_disk(self):
+        """Supprime les PNG les plus anciens (thème, taille ou DPR abandonnés) au-delà du budget."""
+        try:
+            with os.scandir(self.cache_dir) as it:
+                entries = [(e.stat().st_mtime_ns, e.stat().st_size, e.path)
+                           for e in it if e.name.endswith(".png") and e.is_file()]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def _remember(self, key, pixmap):
+        size = pixmap.width() * pixmap.height() * 4
+        self._pixmaps[key] = pixmap
+        self._bytes += size
+        while self._bytes > self.budget and len(self._pixmaps) > 1:
+            _, old = self._pixmaps.popitem(last=False)
+            self._bytes -= old.width() * old.height() * 4
+
+    def clear(self):
+        self._pixmaps.clear()
+        self._bytes = 0
+
+
+def get_image_cache():
+    global _shared
+    if _shared is None:
+        _shared = ImageCache()
+    return _shared
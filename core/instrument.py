@@ -0,0 +1,191 @@
+import os
+import json
+import math
+import time
+import threading
+import functools
+from collections import deque
+
+# Histogrammes : 4 cases par octave de 10 µs à ~10 s
+_BUCKET_MIN_MS = 0.01
+_BUCKETS_PER_OCTAVE = 4
+_BUCKET_COUNT = 80
+# Derniers intervalles gardés pour la trace Chrome
+TRACE_EVENTS = 50000
+
+_clock = time.perf_counter_ns
+# Lu à chaque span : tant qu'il est faux, une mesure ne coûte qu'un test
+enabled = False
+_histograms = {}
+_trace = deque(maxlen=TRACE_EVENTS)
+_lock = threading.Lock()
+_origin_ns = _clock()
+
+
+def requested(config=None):
+    """Activé par NYRVANA_INSTRUMENT=1 ou "debug": {"instrument": true}."""
+    if os.environ.get("NYRVANA_INSTRUMENT") == "1":
+        return True
+    return bool((config or {}).get("debug", {}).get("instrument", False))
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+class Histogram:
+    """Durées (ms) en cases logarithmiques de taille fixe : pas d'allocation par mesure."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(value_ms):
+        if value_ms <= _BUCKET_MIN_MS:
+            return 0
+        i = int(math.log2(value_ms / _BUCKET_MIN_MS) * _BUCKETS_PER_OCTAVE) + 1
+        return min(i, _BUCKET_COUNT - 1)
+
+    @staticmethod
+    def upper_bound(i):
+        return _BUCKET_MIN_MS * 2 ** (i / _BUCKETS_PER_OCTAVE)
+
+    def add(self, value_ms):
+        self.counts[self.bucket(value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, p):
+        """Borne haute de la case qui contient le p-ième centile (précision ~19 %)."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.upper_bound(i), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+        }
+
+
+def record(name, start_ns, end_ns):
+    """Intervalle mesuré à la main (ex. commencé dans un hook, fini dans un autre)."""
+    duration_ms = (end_ns - start_ns) / 1e6
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(duration_ms)
+        _trace.append((name, start_ns, end_ns - start_ns, threading.get_ident()))
+
+
+def record_value(name, value_ms):
+    """Valeur sans intervalle (retard d'un timer...) : histogramme seulement."""
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(value_ms)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, _clock())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """with span("visualizer.compute"): ...  — sans effet si l'instrumentation est coupée."""
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+def timed(name):
+    """Décorateur équivalent à span() autour de toute la fonction."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = _clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, start, _clock())
+        return wrapper
+    return decorate
+
+
+def now_ns():
+    return _clock()
+
+
+def snapshot():
+    """Résumé de chaque histogramme, par nom."""
+    with _lock:
+        return {name: hist.summary() for name, hist in sorted(_histograms.items())}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _trace.clear()
+
+
+def dump_json(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"spans": snapshot()}, f, indent=2)
+
+
+def dump_chrome_trace(path):
+    """Format Trace Event (chrome://tracing, Perfetto) : un événement "X" par intervalle."""
+    pid = os.getpid()
+    with _lock:
+        events = [
+            {"name": name, "ph": "X", "pid": pid, "tid": tid,
+             "ts": (start - _origin_ns) / 1000, "dur": duration / 1000}
+            for name, start, duration, tid in _trace
+        ]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,317 @@
+import os
+import json
+import sqlite3
+import threading
+import wave
+from collections import namedtuple
+
+from core.seek_index import SeekIndex, build_seek_index, SEEK_INTERVAL_MS
+
+SUPPORTED_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.opus')
+
+TrackInfo = namedtuple(
+    "TrackInfo",
+    ["path", "mtime_ns", "size", "duration_ms", "sample_rate", "channels", "tags", "digest"],
+)
+
+
+def default_index_path(folder_path):
+    """
+    Emplacement de l'index : à côté du dossier de musique
+    (assets/music -> assets/library.sqlite).
+    """
+    parent = os.path.dirname(os.path.abspath(folder_path))
+    return os.path.join(parent, "library.sqlite")
+
+
+def _tags_to_dict(tags):
+    result = {}
+    if not tags:
+        return result
+    try:
+        keys = list(tags.keys())
+    except Exception:
+        return result
+    for key in keys:
+        try:
+            value = tags[key]
+        except Exception:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = "; ".join(str(v) for v in value)
+        else:
+            value = str(value)
+        result[str(key)] = value
+    return result
+
+
+def probe_file(path):
+    """
+    Lit une seule fois les métadonnées d'un fichier audio
+    (durée, fréquence d'échantillonnage, canaux, tags).
+    """
+    duration_ms = 0
+    sample_rate = 0
+    channels = 0
+    tags = {}
+    # Import différé : inutile au démarrage quand l'index est à jour
+    from mutagen import File as MutagenFile
+    try:
+        audio = MutagenFile(path, easy=True)
+    except Exception:
+        audio = None
+    if audio is not None and audio.info is not None:
+        duration_ms = int(getattr(audio.info, "length", 0) * 1000)
+        sample_rate = int(getattr(audio.info, "sample_rate", 0) or 0)
+        channels = int(getattr(audio.info, "channels", 0) or 0)
+        tags = _tags_to_dict(audio.tags)
+
+    # Repli sur le module standard pour les WAV que mutagen ne lit pas
+    if duration_ms == 0 and path.lower().endswith('.wav'):
+        try:
+            with wave.open(path, "rb") as w:
+                sample_rate = w.getframerate()
+                channels = w.getnchannels()
+                if sample_rate:
+                    duration_ms = int(w.getnframes() * 1000 / sample_rate)
+        except Exception:
+            pass
+    return duration_ms, sample_rate, channels, tags
+
+
+class LibraryIndex:
+    """
+    Index persistant (SQLite) des métadonnées de la bibliothèque.
+    Chaque fichier est identifié par chemin + mtime + taille et n'est
+    analysé qu'une seule fois ; les lectures se font depuis la mémoire.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._tracks = {}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tracks ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " duration_ms INTEGER NOT NULL,"
+            " sample_rate INTEGER NOT NULL,"
+            " channels INTEGER NOT NULL,"
+            " tags TEXT NOT NULL,"
+            " digest TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seek_index ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " interval_ms INTEGER NOT NULL,"
+            " times BLOB NOT NULL,"
+            " offsets BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS loudness ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " lufs REAL,"
+            " peak REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._seek_indexes = {}
+        self._loudness = {}
+        self._load_all()
+
+    def _load_all(self):
+        rows = self._conn.execute(
+            "SELECT path, mtime_ns, size, duration_ms, sample_rate, channels, tags, digest FROM tracks"
+        ).fetchall()
+        for row in rows:
+            try:
+                tags = json.loads(row[6])
+            except ValueError:
+                tags = {}
+            self._tracks[row[0]] = TrackInfo(row[0], row[1], row[2], row[3], row[4], row[5], tags, row[7])
+        rows = self._conn.execute("SELECT path, mtime_ns, size, lufs, peak FROM loudness").fetchall()
+        for row in rows:
+            self._loudness[row[0]] = ((row[1], row[2]), (row[3], row[4]))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _is_fresh(self, info, st):
+        return info is not None and info.mtime_ns == st.st_mtime_ns and info.size == st.st_size
+
+    def _index_file(self, path, st):
+        duration_ms, sample_rate, channels, tags = probe_file(path)
+        info = TrackInfo(path, st.st_mtime_ns, st.st_size, duration_ms, sample_rate, channels, tags, None)
+        self._tracks[path] = info
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, info.mtime_ns, info.size, duration_ms, sample_rate, channels,
+             json.dumps(tags, ensure_ascii=False), None),
+        )
+        return info
+
+    def scan(self, paths, prune=True):
+        """
+        Met à jour l'index pour la liste de chemins donnée : seuls les
+        fichiers nouveaux ou modifiés sont analysés. Si prune est vrai,
+        les entrées absentes de la liste sont supprimées. Le verrou n'est
+        pris que fichier par fichier : les lectures d'autres threads ne
+        restent pas bloquées pendant tout le parcours.
+        """
+        seen = set()
+        for path in paths:
+            seen.add(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if not self._is_fresh(self._tracks.get(path), st):
+                with self._lock:
+                    if not self._is_fresh(self._tracks.get(path), st):
+                        self._index_file(path, st)
+        with self._lock:
+            if prune:
+                folders = {os.path.dirname(p) for p in seen}
+                stale = [p for p in self._tracks
+                         if p not in seen and os.path.dirname(p) in folders]
+                for path in stale:
+                    self._remove(path)
+            self._conn.commit()
+
+    def _remove(self, path):
+        self._tracks.pop(path, None)
+        self._seek_indexes.pop(path, None)
+        self._loudness.pop(path, None)
+        self._conn.execute("DELETE FROM tracks WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM seek_index WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM loudness WHERE path = ?", (path,))
+
+    def remove(self, path):
+        with self._lock:
+            self._remove(path)
+            self._conn.commit()
+
+    def get(self, path):
+        """Retourne le TrackInfo en mémoire, en indexant le fichier si besoin."""
+        info = self._tracks.get(path)
+        if info is not None:
+            return info
+        with self._lock:
+            info = self._tracks.get(path)
+            if info is not None:
+                # Indexé entre-temps par un autre thread (LibraryScanner)
+                return info
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            info = self._index_file(path, st)
+            self._conn.commit()
+            return info
+
+    def duration_ms(self, path):
+        info = self.get(path)
+        return info.duration_ms if info is not None else 0
+
+    def get_digest(self, path):
+        """
+        Empreinte SHA1 enregistrée pour la version actuelle du fichier
+        (clé des caches de spectre et de forme d'onde), sinon None.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        info = self._tracks.get(path)
+        if not self._is_fresh(info, st):
+            return None
+        return info.digest
+
+    def set_digest(self, path, digest):
+        info = self.get(path)
+        if info is None:
+            return
+        with self._lock:
+            self._tracks[path] = info._replace(digest=digest)
+            self._conn.execute(
+                "UPDATE tracks SET digest = ? WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (digest, path, info.mtime_ns, info.size),
+            )
+            self._conn.commit()
+
+    def get_seek_index(self, path, build=True):
+        """
+        Index de reprise d'un MP3 (voir core.seek_index), construit une
+        seule fois par version du fichier puis gardé en base et en mémoire.
+        Avec build=False, retourne None plutôt que de parcourir le fichier.
+        """
+        if not path.lower().endswith('.mp3'):
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._seek_indexes.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, interval_ms, times, offsets FROM seek_index WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if row is not None and (row[0], row[1]) == key and row[2] == SEEK_INTERVAL_MS:
+            index = SeekIndex.from_blobs(row[2], row[3], row[4])
+            self._seek_indexes[path] = (key, index)
+            return index
+        if not build:
+            return None
+
+        try:
+            index = build_seek_index(path, SEEK_INTERVAL_MS)
+        except (OSError, ValueError):
+            index = None
+        if index is None:
+            return None
+        times, offsets = index.to_blobs()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO seek_index VALUES (?, ?, ?, ?, ?, ?)",
+                (path, key[0], key[1], SEEK_INTERVAL_MS, times, offsets),
+            )
+            self._conn.commit()
+        self._seek_indexes[path] = (key, index)
+        return index
+
+    def get_loudness(self, path):
+        """(LUFS ou None si silence, crête) mesurés pour cette version du fichier, sinon None."""
+        info = self.get(path)
+        cached = self._loudness.get(path)
+        if info is None or cached is None or cached[0] != (info.mtime_ns, info.size):
+            return None
+        return cached[1]
+
+    def set_loudness(self, path, lufs, peak):
+        info = self.get(path)
+        if info is None:
+            return
+        key = (info.mtime_ns, info.size)
+        with self._lock:
+            self._loudness[path] = (key, (lufs, peak))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO loudness VALUES (?, ?, ?, ?, ?)",
+                (path, key[0], key[1], lufs, peak),
+            )
+            self._conn.commit()
+
+    def missing_loudness(self, paths):
+        """Pistes dont la loudness n'a pas encore été mesurée (analyse incrémentale)."""
+        return [p for p in paths if self.get_loudness(p) is None]
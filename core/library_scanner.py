@@ -0,0 +1,58 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+# Pistes indexées entre deux signaux
+SCAN_CHUNK = 64
+
+
+class LibraryScanner(QThread):
+    """
+    Met à jour l'index de la bibliothèque (durées, tags) hors du thread Qt.
+    La playlist est affichée tout de suite depuis le dossier ; scanned_signal
+    annonce chaque lot de pistes indexées au fur et à mesure.
+    """
+    scanned_signal = pyqtSignal(list)
+
+    def __init__(self, library):
+        super().__init__()
+        self.library = library
+        self._pending = []
+        self._prune = None
+        self._stopping = False
+        self._cond = threading.Condition()
+
+    def request(self, paths, prune=False):
+        """prune : paths est toute la playlist, les entrées disparues sont retirées."""
+        with self._cond:
+            self._pending.extend(paths)
+            if prune:
+                self._prune = list(paths)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending and self._prune is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                paths = list(dict.fromkeys(self._pending))
+                self._pending = []
+                prune = self._prune
+                self._prune = None
+
+            for start in range(0, len(paths), SCAN_CHUNK):
+                if self._stopping:
+                    return
+                chunk = paths[start:start + SCAN_CHUNK]
+                self.library.scan(chunk, prune=False)
+                self.scanned_signal.emit(chunk)
+            if prune is not None:
+                # Tout est à jour : ce passage ne fait que des stat()
+                self.library.scan(prune, prune=True)
@@ -0,0 +1,167 @@
+import os
+import numpy as np
+from core import stream_decoder
+
+# Mesure selon ITU-R BS.1770 / EBU R128
+LOUDNESS_RATE = 48000
+SUBBLOCK_MS = 100          # pas des blocs de mesure (recouvrement de 75 %)
+GATE_BLOCKS = 4            # 4 x 100 ms = blocs de 400 ms
+ABSOLUTE_GATE = -70.0      # LUFS
+RELATIVE_GATE = -10.0      # LU sous la première moyenne
+# Niveau visé (ReplayGain 2)
+TARGET_LUFS = -18.0
+# Sous-blocs transformés d'un coup
+_CHUNK_SUBBLOCKS = 50
+# Pondération des canaux (BS.1770) dans l'ordre ffmpeg : avant gauche/droit et
+# centre 1, arrière/côtés 1.41, LFE ignoré. Au-delà, ffmpeg réduit en 5.1
+_CHANNEL_WEIGHTS = {
+    1: (1.0,),
+    2: (1.0, 1.0),
+    3: (1.0, 1.0, 1.0),
+    4: (1.0, 1.0, 1.41, 1.41),
+    5: (1.0, 1.0, 1.0, 1.41, 1.41),
+    6: (1.0, 1.0, 1.0, 0.0, 1.41, 1.41),
+}
+MAX_CHANNELS = 6
+
+
+def _biquad_response(b, a, freqs, rate):
+    z = np.exp(-2j * np.pi * freqs / rate)
+    num = b[0] + b[1] * z + b[2] * z * z
+    den = a[0] + a[1] * z + a[2] * z * z
+    return num / den
+
+
+def k_weighting_power(n_fft, rate=LOUDNESS_RATE):
+    """
+    |H(f)|² du filtre de pondération K (plateau haut + passe-haut RLB)
+    aux fréquences d'une rfft de n_fft points. L'énergie filtrée d'un
+    bloc se calcule alors directement dans le domaine fréquentiel.
+    """
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / rate)
+
+    # Étage 1 : plateau haut (+4 dB au-dessus de ~1.7 kHz), coefficients
+    # obtenus par transformée bilinéaire du prototype de la norme
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    K = np.tan(np.pi * f0 / rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + K / q + K * K
+    shelf = _biquad_response(
+        ((vh + vb * K / q + K * K) / a0, 2 * (K * K - vh) / a0, (vh - vb * K / q + K * K) / a0),
+        (1.0, 2 * (K * K - 1) / a0, (1 - K / q + K * K) / a0),
+        freqs, rate,
+    )
+
+    # Étage 2 : passe-haut RLB (~38 Hz)
+    f0, q = 38.13547087602444, 0.5003270373238773
+    K = np.tan(np.pi * f0 / rate)
+    a0 = 1 + K / q + K * K
+    highpass = _biquad_response(
+        (1.0, -2.0, 1.0),
+        (1.0, 2 * (K * K - 1) / a0, (1 - K / q + K * K) / a0),
+        freqs, rate,
+    )
+
+    power = np.abs(shelf * highpass) ** 2
+    # Poids de la rfft pour Parseval : les bins intérieurs comptent double
+    weights = np.full(len(freqs), 2.0)
+    weights[0] = 1.0
+    if n_fft % 2 == 0:
+        weights[-1] = 1.0
+    return power * weights / (n_fft * n_fft)
+
+
+def subblock_energies(blocks, rate=LOUDNESS_RATE, channels=2):
+    """
+    Énergie pondérée K (somme pondérée des canaux) de chaque sous-bloc de
+    100 ms, et crête échantillon. blocks : tableaux int16 entrelacés.
+    """
+    n = rate * SUBBLOCK_MS // 1000
+    weights = k_weighting_power(n, rate)
+    channel_weights = np.asarray(_CHANNEL_WEIGHTS[channels])
+    energies = []
+    peak = 0
+    carry = np.zeros(0, dtype=np.int16)
+    for block in blocks:
+        data = np.concatenate((carry, block)) if len(carry) else block
+        usable = len(data) // (n * channels) * (n * channels)
+        carry = data[usable:]
+        if usable == 0:
+            continue
+        frames = data[:usable].reshape(-1, n, channels)
+        peak = max(peak, int(np.abs(frames.astype(np.int32)).max()))
+        for start in range(0, len(frames), _CHUNK_SUBBLOCKS):
+            chunk = frames[start:start + _CHUNK_SUBBLOCKS].astype(np.float32) / 32768.0
+            spectrum = np.fft.rfft(chunk, axis=1)
+            # (sous-blocs, bins, canaux) -> somme sur les bins puis les canaux
+            power = np.einsum("sbc,b,c->s", np.abs(spectrum) ** 2, weights, channel_weights)
+            energies.append(power)
+    if len(carry):
+        peak = max(peak, int(np.abs(carry.astype(np.int32)).max()))
+    energies = np.concatenate(energies) if energies else np.zeros(0)
+    return energies, peak / 32768.0
+
+
+def integrated_loudness(energies):
+    """Loudness intégrée (LUFS) avec les portes absolue et relative, None si silence."""
+    if len(energies) < GATE_BLOCKS:
+        return None
+    # Blocs de 400 ms glissants par pas de 100 ms
+    windows = np.lib.stride_tricks.sliding_window_view(energies, GATE_BLOCKS).mean(axis=1)
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10 * np.log10(windows)
+    gated = windows[levels > ABSOLUTE_GATE]
+    if len(gated) == 0:
+        return None
+    relative = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE
+    gated = windows[(levels > ABSOLUTE_GATE) & (levels > relative)]
+    if len(gated) == 0:
+        return None
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def analyze_loudness(path):
+    """
+    Retourne (loudness intégrée en LUFS ou None, crête 0..1). Décodage en
+    flux par ffmpeg (mémoire bornée), sinon pydub. Exécutable dans un
+    processus séparé. Chaque piste est mesurée avec ses propres canaux :
+    un fichier mono n'est pas compté deux fois.
+    """
+    if stream_decoder.ffmpeg_available():
+        from core.library import probe_file
+        channels = min(max(probe_file(path)[2], 1), MAX_CHANNELS)
+        blocks = stream_decoder.iter_pcm_blocks(
+            path, LOUDNESS_RATE, LOUDNESS_RATE, channels=channels
+        )
+    else:
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(path).set_frame_rate(LOUDNESS_RATE)
+        if segment.channels > 2:
+            # pydub ne sait réduire qu'en mono ou stéréo
+            segment = segment.set_channels(2)
+        channels = segment.channels
+        blocks = [np.array(segment.get_array_of_samples(), dtype=np.int16)]
+    energies, peak = subblock_energies(blocks, channels=channels)
+    return integrated_loudness(energies), peak
+
+
+def gain_factor(lufs, peak, target=TARGET_LUFS):
+    """
+    Facteur de volume à appliquer (0..1). Le mixer ne sait pas
+    amplifier : les pistes trop faibles restent à 1.
+    """
+    if lufs is None:
+        return 1.0
+    factor = 10 ** ((target - lufs) / 20)
+    if peak > 0:
+        factor = min(factor, 1.0 / peak)
+    return float(min(1.0, factor))
+
+
+def _init_worker():
+    # L'analyse passe après la lecture
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
@@ -0,0 +1,83 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.loudness import analyze_loudness, _init_worker
+
+
+class LoudnessScanner(QThread):
+    """
+    Mesure la loudness des pistes qui ne l'ont pas encore dans l'index,
+    dans un pool de processus (tous les cœurs, priorité basse) : la
+    lecture n'est jamais ralentie. Les résultats sont enregistrés dans
+    la LibraryIndex au fur et à mesure.
+    """
+    measured_signal = pyqtSignal(str, object)
+
+    def __init__(self, library, workers=None):
+        super().__init__()
+        self.library = library
+        self.workers = workers or os.cpu_count() or 1
+        self._pending = []
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._pool = None
+
+    def request(self, paths):
+        with self._cond:
+            self._pending.extend(paths)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            pool = self._pool
+            self._cond.notify()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                paths = list(dict.fromkeys(self._pending))
+                self._pending = []
+
+            paths = self.library.missing_loudness(paths)
+            if not paths:
+                continue
+            # "spawn" : pas de fork d'un processus Qt multi-thread
+            pool = ProcessPoolExecutor(
+                max_workers=min(self.workers, len(paths)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            with self._cond:
+                if self._stopping:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return
+                self._pool = pool
+            try:
+                futures = {pool.submit(analyze_loudness, p): p for p in paths}
+                for future in as_completed(futures):
+                    if self._stopping:
+                        break
+                    path = futures[future]
+                    try:
+                        lufs, peak = future.result()
+                    except Exception:
+                        continue
+                    self.library.set_loudness(path, lufs, peak)
+                    self.measured_signal.emit(path, (lufs, peak))
+            except RuntimeError:
+                # Pool arrêté par stop()
+                pass
+            finally:
+                with self._cond:
+                    self._pool = None
+                pool.shutdown(wait=not self._stopping, cancel_futures=True)
@@ -0,0 +1,87 @@
+import os
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from core.actions import (
+    playlist, index_of, load_playlist_from_folder, load_playlist_snapshot, add_track, remove_track,
+    rename_track, sync_playlist_with_folder
+)
+
+
+class PlaylistModel(QAbstractListModel):
+    """
+    Modèle Qt posé directement sur la playlist de core.actions : aucune
+    copie ni widget par piste, le texte d'une ligne n'est calculé que
+    lorsque la vue l'affiche. Les modifications passent par ce modèle
+    pour que la vue soit prévenue.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(playlist)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        row = index.row()
+        if not index.isValid() or not 0 <= row < len(playlist):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(playlist[row])
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return playlist[row]
+        return None
+
+    def load_folder(self, folder_path, scan=True):
+        self.beginResetModel()
+        try:
+            load_playlist_from_folder(folder_path, scan)
+        finally:
+            self.endResetModel()
+
+    def load_snapshot(self, paths):
+        self.beginResetModel()
+        try:
+            load_playlist_snapshot(paths)
+        finally:
+            self.endResetModel()
+
+    def sync_folder(self, folder_path, scan=True):
+        self.beginResetModel()
+        try:
+            return sync_playlist_with_folder(folder_path, scan)
+        finally:
+            self.endResetModel()
+
+    def add_path(self, path, scan=True):
+        """Retourne (ligne, ajoutée ?)."""
+        row = index_of(path)
+        if row >= 0:
+            add_track(path, scan)
+            return row, False
+        end = len(playlist)
+        self.beginInsertRows(QModelIndex(), end, end)
+        try:
+            row = add_track(path, scan)
+        finally:
+            self.endInsertRows()
+        return row, True
+
+    def remove_path(self, path):
+        row = index_of(path)
+        if row < 0:
+            remove_track(path)
+            return -1
+        self.beginRemoveRows(QModelIndex(), row, row)
+        try:
+            remove_track(path)
+        finally:
+            self.endRemoveRows()
+        return row
+
+    def rename_path(self, old_path, new_path):
+        row = rename_track(old_path, new_path)
+        if row >= 0:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx)
+        return row
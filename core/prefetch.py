@@ -0,0 +1,91 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.visualizer import PreparedAudio
+
+# Octets lus d'avance en début de fichier (mis en cache par le système)
+WARM_BYTES = 1 << 20
+
+
+def warm_file(path, max_bytes):
+    """Ouvre le fichier et lit son début pour que le chargement soit immédiat."""
+    remaining = max(0, max_bytes)
+    with open(path, "rb") as f:
+        while remaining > 0:
+            chunk = f.read(min(remaining, 256 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+
+class Prefetcher(QThread):
+    """
+    Prépare la piste suivante pendant la fin de la piste courante :
+    fichier ouvert, premiers blocs décodés et données du visualiseur
+    prêtes, dans la limite d'un budget mémoire. Comme pour le
+    TrackLoader, une nouvelle demande annule la précédente.
+    """
+    ready_signal = pyqtSignal(int, int, object)
+
+    def __init__(self, visualizer, library, budget_bytes):
+        super().__init__()
+        self.visualizer = visualizer
+        self.library = library
+        self.budget_bytes = budget_bytes
+        self.generation = 0
+        self._pending = None
+        self._stopping = False
+        self._cond = threading.Condition()
+
+    def request(self, index, path, with_visualizer=True):
+        with self._cond:
+            self.generation += 1
+            self._pending = (self.generation, index, path, with_visualizer)
+            self._cond.notify()
+            return self.generation
+
+    def cancel(self):
+        with self._cond:
+            self.generation += 1
+            self._pending = None
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.wait()
+
+    def _prepare(self, path):
+        info = self.library.get(path)
+        if info is None:
+            return None
+        cost = self.visualizer.prepare_cost_bytes(
+            path, info.duration_ms, info.sample_rate, info.channels
+        )
+        if cost > self.budget_bytes:
+            # Hors budget : le visualiseur sera rempli par l'analyse en arrière-plan
+            return PreparedAudio(path, self.visualizer.num_bars, None, None, None)
+        return self.visualizer.prepare_audio(path)
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                generation, index, path, with_visualizer = self._pending
+                self._pending = None
+
+            try:
+                warm_file(path, min(WARM_BYTES, self.budget_bytes))
+                prepared = self._prepare(path) if with_visualizer else None
+            except Exception:
+                prepared = None
+            if not self.is_current(generation):
+                if prepared is not None:
+                    self.visualizer.discard_audio(prepared)
+                continue
+            self.ready_signal.emit(generation, index, prepared)
@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import socket
+import argparse
+import tempfile
+
+# Le client n'importe ni pygame ni Qt : core.daemon importe ce module, pas l'inverse
+CONNECT_TIMEOUT_S = 2.0
+
+
+def default_socket_path():
+    folder = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(folder, f"nyrvana-{uid}.sock")
+
+
+class RemoteError(Exception):
+    pass
+
+
+class RemotePlayer:
+    """
+    Client du démon (core.daemon) : une connexion gardée ouverte, une
+    requête JSON par ligne. Lève OSError si le démon ne répond pas et
+    RemoteError si la commande est refusée.
+    """
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT_S)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = None
+            self._file = None
+
+    def call(self, cmd, **args):
+        if self._sock is None:
+            self.connect()
+        try:
+            self._file.write((json.dumps(dict(args, cmd=cmd)) + "\n").encode("utf-8"))
+            self._file.flush()
+            line = self._file.readline()
+        except OSError:
+            self.close()
+            raise
+        if not line:
+            self.close()
+            raise ConnectionError("le démon a fermé la connexion")
+        reply = json.loads(line)
+        if not reply.pop("ok", False):
+            raise RemoteError(reply.get("error", "erreur inconnue"))
+        return reply
+
+
+def daemon_running(socket_path=None):
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    player = RemotePlayer(socket_path)
+    try:
+        player.connect()
+        return True
+    except OSError:
+        return False
+    finally:
+        player.close()
+
+
+def _format_status(status):
+    pos = status.get("position_ms", 0) // 1000
+    dur = status.get("duration_ms", 0) // 1000
+    state = "lecture" if status.get("playing") else "pause"
+    loop = " (boucle)" if status.get("looping") else ""
+    return (f"[{state}{loop}] {status.get('index', -1) + 1}/{status.get('count', 0)} "
+            f"{status.get('track') or '-'}  {pos // 60:02}:{pos % 60:02} / {dur // 60:02}:{dur % 60:02}"
+            f"  volume {round(status.get('volume', 0) * 100)}%")
+
+
+def main(argv=None):
+    # Pilote le lecteur en arrière-plan :
+    #   python -m core.remote play|pause|toggle|next|prev|status|playlist|rescan|quit
+    #   python -m core.remote seek 90        (secondes)
+    #   python -m core.remote select 3       (numéro dans la playlist, à partir de 1)
+    #   python -m core.remote volume 40      (pourcentage)
+    #   python -m core.remote loop [on|off]
+    parser = argparse.ArgumentParser(description="Commande du lecteur en arrière-plan")
+    parser.add_argument("command")
+    parser.add_argument("value", nargs="?")
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument("--json", action="store_true", help="réponse brute")
+    args = parser.parse_args(argv)
+
+    request = {}
+    try:
+        if args.command == "seek":
+            request["ms"] = int(float(args.value) * 1000)
+        elif args.command == "select":
+            request["index"] = int(args.value) - 1
+        elif args.command == "volume":
+            request["value"] = float(args.value) / 100
+        elif args.command == "loop" and args.value is not None:
+            request["on"] = args.value in ("on", "1", "oui")
+    except (TypeError, ValueError):
+        parser.error(f"valeur attendue pour {args.command}")
+
+    player = RemotePlayer(args.socket)
+    try:
+        reply = player.call(args.command, **request)
+    except OSError:
+        print(f"Aucun lecteur en arrière-plan sur {args.socket} (python -m core.daemon)")
+        return 1
+    except RemoteError as e:
+        print(f"Erreur : {e}")
+        return 1
+    finally:
+        player.close()
+
+    if args.json:
+        print(json.dumps(reply, ensure_ascii=False, indent=2))
+    elif args.command == "playlist":
+        for i, path in enumerate(reply["paths"]):
+            marker = ">" if i == reply["index"] else " "
+            print(f"{marker}{i + 1:4d}  {path}")
+    elif "playing" in reply:
+        print(_format_status(reply))
+    elif reply:
+        print(reply)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
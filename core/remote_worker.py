@@ -0,0 +1,53 @@
+import threading
+from collections import deque
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.remote import RemotePlayer, RemoteError
+
+
+class RemoteWorker(QThread):
+    """
+    Connexion au démon hors du thread Qt : une commande peut attendre que
+    le démon rende son verrou (rescan...) sans figer la fenêtre. Les
+    commandes partent dans l'ordre ; les demandes d'état en attente sont
+    regroupées en une seule.
+    """
+    reply_signal = pyqtSignal(str, object)
+    error_signal = pyqtSignal(str, str)
+
+    def __init__(self, socket_path=None):
+        super().__init__()
+        self.remote = RemotePlayer(socket_path)
+        self._pending = deque()
+        self._stopping = False
+        self._cond = threading.Condition()
+
+    def request(self, cmd, **args):
+        with self._cond:
+            if cmd == "status" and any(c == "status" for c, _ in self._pending):
+                return
+            self._pending.append((cmd, args))
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._cond.notify()
+        self.wait()
+        self.remote.close()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                cmd, args = self._pending.popleft()
+
+            try:
+                reply = self.remote.call(cmd, **args)
+            except (OSError, RemoteError, ValueError) as e:
+                self.error_signal.emit(cmd, str(e))
+                continue
+            self.reply_signal.emit(cmd, reply)
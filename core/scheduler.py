@@ -0,0 +1,123 @@
+import time
+from PyQt6.QtCore import QObject, QTimer, QEvent, Qt
+from core import instrument
+
+# Rafraîchissement du texte (temps écoulé, barre de progression)
+TEXT_INTERVAL_MS = 200
+# Fenêtre cachée ou réduite : seule la fin de piste doit encore être surveillée
+HIDDEN_TEXT_INTERVAL_MS = 1000
+# Pas de référence du visualiseur (trames du spectre pré-calculé)
+FRAME_REFERENCE_MS = 50
+# Marge avant la fin de piste pour déclencher l'enchaînement à temps
+END_MARGIN_MS = 500
+
+
+class RefreshScheduler(QObject):
+    """
+    Remplace le timer fixe de 50 ms : deux horloges indépendantes, une
+    pour le texte et la progression, une pour le visualiseur (calée sur
+    la fréquence de l'écran, plafonnée par max_fps).
+    - en pause ou sans piste : aucun réveil ;
+    - fenêtre cachée ou réduite : plus de trames, texte au ralenti mais
+      réveil juste avant la fin de piste pour enchaîner ;
+    on_text() retourne le temps restant avant la fin de piste (ms) ou None.
+    on_frame(steps) reçoit le temps écoulé en pas de 50 ms.
+    """
+
+    def __init__(self, window, is_active, on_text, on_frame, max_fps=60,
+                 text_ms=TEXT_INTERVAL_MS, hidden_text_ms=HIDDEN_TEXT_INTERVAL_MS):
+        super().__init__(window)
+        self.window = window
+        self.is_active = is_active
+        self.on_text = on_text
+        self.on_frame = on_frame
+        self.max_fps = max_fps
+        self.text_ms = text_ms
+        self.hidden_text_ms = hidden_text_ms
+        self._last_frame = None
+        # Échéance prévue du prochain tick texte (mesure du retard)
+        self._text_due = None
+
+        self.text_timer = QTimer(self)
+        self.text_timer.setSingleShot(True)
+        self.text_timer.timeout.connect(self._text_tick)
+
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.frame_timer.timeout.connect(self._frame_tick)
+
+        window.installEventFilter(self)
+
+    def frame_interval_ms(self):
+        rate = 60.0
+        screen = self.window.screen()
+        if screen is not None and screen.refreshRate() > 0:
+            rate = screen.refreshRate()
+        fps = min(rate, self.max_fps) if self.max_fps else rate
+        return max(1, int(round(1000 / fps)))
+
+    def is_visible(self):
+        return self.window.isVisible() and not self.window.isMinimized()
+
+    def refresh(self):
+        """À appeler après tout changement d'état (lecture, pause, piste, fenêtre)."""
+        remaining = self.on_text()
+        if not self.is_active():
+            self.text_timer.stop()
+            self.frame_timer.stop()
+            self._last_frame = None
+            return
+        self._schedule_text(remaining)
+        if self.is_visible():
+            interval = self.frame_interval_ms()
+            if not self.frame_timer.isActive() or self.frame_timer.interval() != interval:
+                self.frame_timer.start(interval)
+        else:
+            self.frame_timer.stop()
+            self._last_frame = None
+
+    def _schedule_text(self, remaining):
+        interval = self.text_ms if self.is_visible() else self.hidden_text_ms
+        if remaining is not None:
+            # Réveil précis juste avant la fin de piste
+            until_end = remaining - END_MARGIN_MS
+            if until_end > 0:
+                interval = min(interval, int(until_end))
+            else:
+                interval = min(interval, 20)
+        interval = max(1, interval)
+        self._text_due = time.perf_counter() + interval / 1000
+        self.text_timer.start(interval)
+
+    def _text_tick(self):
+        if instrument.enabled and self._text_due is not None:
+            instrument.record_value("tick.text.late", (time.perf_counter() - self._text_due) * 1000)
+        if not self.is_active():
+            self.refresh()
+            return
+        with instrument.span("tick.text"):
+            remaining = self.on_text()
+        self._schedule_text(remaining)
+        # L'état a pu changer pendant on_text (fin de piste, pause...)
+        if not self.is_active():
+            self.refresh()
+
+    def _frame_tick(self):
+        now = time.perf_counter()
+        if self._last_frame is None:
+            steps = 1.0
+        else:
+            steps = (now - self._last_frame) * 1000 / FRAME_REFERENCE_MS
+            if instrument.enabled:
+                late = (now - self._last_frame) * 1000 - self.frame_timer.interval()
+                instrument.record_value("tick.frame.late", max(0.0, late))
+        self._last_frame = now
+        with instrument.span("tick.frame"):
+            self.on_frame(min(steps, 10.0))
+
+    def eventFilter(self, obj, event):
+        if obj is self.window and event.type() in (
+                QEvent.Type.WindowStateChange, QEvent.Type.Show, QEvent.Type.Hide):
+            # Différé : l'état de la fenêtre n'est à jour qu'après l'événement
+            QTimer.singleShot(0, self.refresh)
+        return False
@@ -0,0 +1,244 @@
+import io
+import os
+import mmap
+import struct
+from array import array
+
+# Intervalle entre deux points de l'index
+SEEK_INTERVAL_MS = 1000
+
+_BITRATES = {
+    # (version MPEG1 ?, couche) -> kbit/s par index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+class SeekIndex:
+    """
+    Points de reprise d'un MP3 : pour chaque intervalle, le temps exact
+    (ms) et l'octet de début de la trame correspondante.
+    """
+
+    def __init__(self, interval_ms, times_ms, offsets):
+        self.interval_ms = interval_ms
+        self.times_ms = times_ms
+        self.offsets = offsets
+
+    def locate(self, ms):
+        """Retourne (offset de la trame, reste à décoder en ms)."""
+        if not self.offsets:
+            return 0, ms
+        k = min(max(int(ms) // self.interval_ms, 0), len(self.offsets) - 1)
+        return self.offsets[k], max(0, int(ms) - self.times_ms[k])
+
+    def to_blobs(self):
+        return array("q", self.times_ms).tobytes(), array("q", self.offsets).tobytes()
+
+    @classmethod
+    def from_blobs(cls, interval_ms, times_blob, offsets_blob):
+        times = array("q")
+        times.frombytes(times_blob)
+        offsets = array("q")
+        offsets.frombytes(offsets_blob)
+        return cls(interval_ms, times, offsets)
+
+
+def parse_frame_header(data, pos):
+    """
+    Décode l'en-tête de trame MPEG audio à la position donnée.
+    Retourne (longueur en octets, échantillons, fréquence, mpeg1, mono) ou None.
+    """
+    if pos + 4 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x01
+    mono = (b3 >> 6) == 3
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2 or mpeg1:
+        length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        length = 72 * bitrate // sample_rate + padding
+        samples = 576
+    return length, samples, sample_rate, mpeg1, mono
+
+
+def _id3v2_size(data):
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = 0
+        for b in data[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _find_sync(data, pos, limit=65536):
+    """Cherche la prochaine trame valide (suivie d'une autre trame valide)."""
+    end = min(len(data) - 4, pos + limit)
+    while pos < end:
+        pos = data.find(b"\xff", pos, end)
+        if pos < 0:
+            return -1
+        header = parse_frame_header(data, pos)
+        if header is not None:
+            following = parse_frame_header(data, pos + header[0])
+            if following is not None or pos + header[0] >= len(data):
+                return pos
+        pos += 1
+    return -1
+
+
+def _read_xing(data, pos, header):
+    """
+    Lit l'en-tête Xing/Info de la première trame (fichiers VBR).
+    Retourne (nb de trames, nb d'octets, toc) ou None.
+    """
+    _, _, _, mpeg1, mono = header
+    if mpeg1:
+        side = 17 if mono else 32
+    else:
+        side = 9 if mono else 17
+    tag = pos + 4 + side
+    if data[tag:tag + 4] not in (b"Xing", b"Info"):
+        return None
+    flags = struct.unpack(">I", data[tag + 4:tag + 8])[0]
+    p = tag + 8
+    frames = total_bytes = None
+    toc = None
+    if flags & 0x1:
+        frames = struct.unpack(">I", data[p:p + 4])[0]
+        p += 4
+    if flags & 0x2:
+        total_bytes = struct.unpack(">I", data[p:p + 4])[0]
+        p += 4
+    if flags & 0x4:
+        toc = bytes(data[p:p + 100])
+    return frames, total_bytes, toc
+
+
+def _index_from_toc(data, first, header, xing, interval_ms):
+    frames, total_bytes, toc = xing
+    _, samples, sample_rate, _, _ = header
+    duration_ms = frames * samples * 1000 // sample_rate
+    audio_start = first + header[0]
+    total_bytes = total_bytes or (len(data) - audio_start)
+    times, offsets = array("q"), array("q")
+    t = 0
+    while t < duration_ms:
+        percent = min(99, t * 100 // duration_ms)
+        approx = audio_start + toc[percent] * total_bytes // 256
+        pos = _find_sync(data, approx)
+        if pos < 0:
+            break
+        # Le TOC est une approximation : on prend le temps du palier visé
+        times.append(t)
+        offsets.append(pos)
+        t += interval_ms
+    return SeekIndex(interval_ms, times, offsets)
+
+
+def build_seek_index(path, interval_ms=SEEK_INTERVAL_MS):
+    """
+    Parcourt les en-têtes de trames du MP3 (sans décoder l'audio) et
+    garde un point de reprise par intervalle. Si le flux est trop abîmé
+    pour être parcouru, utilise la table TOC de l'en-tête Xing (VBR).
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return SeekIndex(interval_ms, array("q"), array("q"))
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            first = _find_sync(data, _id3v2_size(data))
+            if first < 0:
+                return None
+            header = parse_frame_header(data, first)
+            xing = _read_xing(data, first, header)
+
+            times, offsets = array("q"), array("q")
+            pos = first
+            if xing is not None:
+                # La trame Xing/Info ne contient pas d'audio
+                pos += header[0]
+            samples_done = 0
+            next_mark = 0
+            sample_rate = header[2]
+            size = len(data)
+            while pos < size - 4:
+                header = parse_frame_header(data, pos)
+                if header is None:
+                    resync = _find_sync(data, pos + 1)
+                    if resync < 0:
+                        break
+                    pos = resync
+                    continue
+                t = samples_done * 1000 // sample_rate
+                if t >= next_mark:
+                    times.append(t)
+                    offsets.append(pos)
+                    next_mark += interval_ms
+                samples_done += header[1]
+                pos += header[0]
+
+            if not offsets and xing is not None and xing[0] and xing[2]:
+                return _index_from_toc(data, first, parse_frame_header(data, first), xing, interval_ms)
+            return SeekIndex(interval_ms, times, offsets)
+
+
+class FileView(io.RawIOBase):
+    """
+    Fichier vu à partir d'un octet donné : le décodeur démarre
+    directement sur la trame visée au lieu de reparcourir le début.
+    """
+
+    def __init__(self, path, start):
+        super().__init__()
+        self._f = open(path, "rb")
+        self._start = start
+        self._size = max(0, os.fstat(self._f.fileno()).st_size - start)
+        self._f.seek(start)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        return self._f.readinto(b)
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            target = self._start + pos
+        elif whence == io.SEEK_CUR:
+            target = self._f.tell() + pos
+        else:
+            target = self._start + self._size + pos
+        self._f.seek(max(self._start, target))
+        return self._f.tell() - self._start
+
+    def tell(self):
+        return self._f.tell() - self._start
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
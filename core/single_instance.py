@@ -0,0 +1,64 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+SERVER_NAME = "nyrvana-player"
+CONNECT_TIMEOUT_MS = 200
+# Seconde tentative avant de considérer le socket comme orphelin
+BUSY_TIMEOUT_MS = 2000
+
+
+class SingleInstance(QObject):
+    """
+    Garde-fou d'instance unique par socket local : un second lancement
+    demande simplement à l'instance en cours de se montrer, puis quitte.
+    """
+    activate_signal = pyqtSignal()
+
+    def __init__(self, name=SERVER_NAME, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.server = None
+        self._last_error = None
+
+    def notify_running(self, timeout_ms=CONNECT_TIMEOUT_MS):
+        """Vrai si une instance répond déjà (elle a été prévenue)."""
+        socket = QLocalSocket()
+        socket.connectToServer(self.name)
+        if not socket.waitForConnected(timeout_ms):
+            self._last_error = socket.error()
+            return False
+        socket.write(b"show\n")
+        socket.waitForBytesWritten(timeout_ms)
+        socket.disconnectFromServer()
+        return True
+
+    def listen(self):
+        """
+        Prend le nom de l'instance. Faux si une autre instance, seulement
+        lente à répondre, le tient déjà (elle a alors été prévenue), ou si
+        le nom reste pris après le nettoyage d'un socket abandonné.
+        """
+        self.server = QLocalServer(self)
+        if not self.server.listen(self.name):
+            if self.notify_running(BUSY_TIMEOUT_MS):
+                self.server = None
+                return False
+            # Personne n'écoute derrière le socket : laissé par une instance qui a planté
+            if self._last_error == QLocalSocket.LocalSocketError.ConnectionRefusedError:
+                QLocalServer.removeServer(self.name)
+            if not self.server.listen(self.name):
+                self.server = None
+                return False
+        self.server.newConnection.connect(self._on_connection)
+        return True
+
+    def _on_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.disconnected.connect(socket.deleteLater)
+            self.activate_signal.emit()
+
+    def release(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
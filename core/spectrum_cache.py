@@ -0,0 +1,198 @@
+import os
+import sys
+import hashlib
+import numpy as np
+from core import stream_decoder
+from core.bands import BandMapper
+
+# Pas entre deux trames pré-calculées (aligné sur le timer de 50 ms)
+HOP_MS = 50
+# Fenêtre d'analyse, identique au calcul en direct du visualiseur
+WINDOW_MS = 100
+# À incrémenter quand le contenu des fichiers en cache change
+CACHE_VERSION = 2
+# Nombre de trames FFT traitées d'un coup pendant l'analyse
+_BLOCK_FRAMES = 256
+
+
+def default_cache_dir():
+    return os.path.join(os.getcwd(), "assets", "cache", "spectrum")
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cached_file_hash(path):
+    """
+    Empreinte du fichier, gardée dans l'index de la bibliothèque avec son
+    mtime et sa taille : elle n'est recalculée que si le fichier a changé,
+    y compris d'un lancement à l'autre.
+    """
+    from core.actions import get_library
+    library = get_library()
+    digest = library.get_digest(path)
+    if digest is None:
+        digest = file_hash(path)
+        library.set_digest(path, digest)
+    return digest
+
+
+def cache_path(digest, num_bars, hop_ms=HOP_MS, cache_dir=None):
+    cache_dir = cache_dir or default_cache_dir()
+    return os.path.join(cache_dir, f"{digest}_v{CACHE_VERSION}_{num_bars}b_{hop_ms}ms.npy")
+
+
+def _frames_to_bands(frames, mapper):
+    out = np.zeros((len(frames), mapper.num_bars), dtype=np.float16)
+    for i in range(0, len(frames), _BLOCK_FRAMES):
+        bands = mapper.process_frames(frames[i:i + _BLOCK_FRAMES])
+        out[i:i + len(bands)] = np.clip(bands, -4, 4)
+    return out
+
+
+def compute_bands_from_blocks(blocks, frame_rate, num_bars, hop_ms=HOP_MS, window_ms=WINDOW_MS):
+    """
+    Comme compute_bands, mais à partir d'une suite de blocs d'échantillons
+    (décodage en continu) : seule une fenêtre de recouvrement est gardée
+    entre deux blocs.
+    """
+    hop = max(1, frame_rate * hop_ms // 1000)
+    win = max(2, frame_rate * window_ms // 1000)
+    mapper = BandMapper(num_bars, frame_rate, win)
+
+    carry = np.zeros(0, dtype=np.float32)
+    parts = []
+    total = 0
+    produced = 0
+    for block in blocks:
+        total += len(block)
+        buf = np.concatenate((carry, np.asarray(block, dtype=np.float32)))
+        if len(buf) >= win:
+            n = (len(buf) - win) // hop + 1
+            frames = np.lib.stride_tricks.sliding_window_view(buf[:(n - 1) * hop + win], win)[::hop]
+            parts.append(_frames_to_bands(frames, mapper))
+            produced += n
+            carry = buf[n * hop:]
+        else:
+            carry = buf
+
+    # Dernières trames, complétées par du silence
+    remaining = (total + hop - 1) // hop - produced
+    if remaining > 0:
+        tail = np.zeros((remaining - 1) * hop + win, dtype=np.float32)
+        tail[:len(carry)] = carry[:len(tail)]
+        frames = np.lib.stride_tricks.sliding_window_view(tail, win)[::hop]
+        parts.append(_frames_to_bands(frames, mapper))
+
+    if not parts:
+        return np.zeros((0, num_bars), dtype=np.float16)
+    return np.concatenate(parts)
+
+
+def compute_bands(samples, frame_rate, num_bars, hop_ms=HOP_MS, window_ms=WINDOW_MS):
+    """
+    Calcule les niveaux bruts par barre (échelle log, voir BandMapper,
+    sans l'intensité ni le lissage) pour toute la piste. Retourne un tableau float16 de
+    forme (nombre de trames, num_bars).
+    """
+    return compute_bands_from_blocks([samples], frame_rate, num_bars, hop_ms, window_ms)
+
+
+def segment_to_mono(segment):
+    samples = np.array(segment.get_array_of_samples())
+    if segment.channels > 1:
+        samples = samples[::segment.channels]
+    return samples
+
+
+def load_cached(path, num_bars, hop_ms=HOP_MS, cache_dir=None, digest=None):
+    """
+    Retourne le spectre mappé en mémoire (lecture seule) s'il existe déjà,
+    sinon None.
+    """
+    try:
+        digest = digest or cached_file_hash(path)
+    except OSError:
+        return None
+    target = cache_path(digest, num_bars, hop_ms, cache_dir)
+    if not os.path.isfile(target):
+        return None
+    try:
+        return np.load(target, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def save_bands(bands, path, num_bars, hop_ms=HOP_MS, cache_dir=None, digest=None):
+    digest = digest or cached_file_hash(path)
+    target = cache_path(digest, num_bars, hop_ms, cache_dir)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Écriture atomique : un lecteur ne voit jamais un fichier partiel
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(bands, dtype=np.float16))
+    os.replace(tmp, target)
+    return np.load(target, mmap_mode="r")
+
+
+def analyze_file(path, num_bars, hop_ms=HOP_MS, cache_dir=None, segment=None, peaks=None):
+    """
+    Passe d'analyse hors-ligne : décode la piste (si besoin), calcule
+    toutes les trames et les enregistre. Retourne le tableau mappé.
+    peaks (un waveform.PeakBuilder) reçoit au passage les mêmes
+    échantillons, pour construire la forme d'onde sans second décodage.
+    """
+    digest = cached_file_hash(path)
+    cached = load_cached(path, num_bars, hop_ms, cache_dir, digest=digest)
+    if cached is not None:
+        return cached
+    if segment is None and stream_decoder.ffmpeg_available():
+        # Mémoire bornée : la piste n'est jamais décodée en entier
+        blocks = stream_decoder.iter_pcm_blocks(path)
+        if peaks is not None:
+            blocks = peaks.tee(blocks)
+        bands = compute_bands_from_blocks(blocks, stream_decoder.STREAM_FRAME_RATE, num_bars, hop_ms)
+    else:
+        if segment is None:
+            from pydub import AudioSegment
+            segment = AudioSegment.from_file(path)
+        samples = segment_to_mono(segment)
+        if peaks is not None:
+            peaks.feed(samples.astype(np.int16))
+        bands = compute_bands(samples, segment.frame_rate, num_bars, hop_ms)
+    return save_bands(bands, path, num_bars, hop_ms, cache_dir, digest=digest)
+
+
+if __name__ == "__main__":
+    # Pré-calcule le spectre et la forme d'onde de toute la bibliothèque :
+    #   python -m core.spectrum_cache [dossier] [num_bars]
+    from core.library import SUPPORTED_EXTENSIONS
+    from core import waveform
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join("assets", "music")
+    bars = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    # Empreintes enregistrées dans l'index de ce dossier
+    from core.actions import get_library
+    get_library(folder)
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(SUPPORTED_EXTENSIONS):
+            full = os.path.join(folder, name)
+            try:
+                # Un seul décodage pour les deux analyses
+                builder = waveform.PeakBuilder() if waveform.load_cached(full) is None else None
+                if builder is not None and load_cached(full, bars) is not None:
+                    waveform.analyze_file(full)
+                    builder = None
+                analyze_file(full, bars, peaks=builder)
+                if builder is not None and not builder.is_empty():
+                    waveform.save_pyramid(builder.build(), full)
+                print(f"ok  {name}")
+            except Exception as e:
+                print(f"err {name}: {e}")
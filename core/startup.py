@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import json
+
+# Budget du premier affichage de la fenêtre (depuis le lancement de l'interpréteur)
+FIRST_PAINT_BUDGET_MS = 400
+SNAPSHOT_VERSION = 1
+
+
+def profiling_requested(argv=None):
+    """Détail des phases : python main.py --startup-profile ou NYRVANA_STARTUP_PROFILE=1."""
+    argv = sys.argv if argv is None else argv
+    return "--startup-profile" in argv or os.environ.get("NYRVANA_STARTUP_PROFILE") == "1"
+
+
+class StartupProfiler:
+    """
+    Chronomètre les phases du démarrage. Les durées sont mesurées dans
+    tous les cas (c'est peu coûteux) mais le détail n'est affiché qu'à la
+    demande ; un dépassement du budget de premier affichage est signalé.
+    """
+
+    def __init__(self, start=None, enabled=False, budget_ms=FIRST_PAINT_BUDGET_MS):
+        self.start = time.perf_counter() if start is None else start
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.phases = []
+        self.first_paint_ms = None
+        self._last = self.start
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000, (now - self.start) * 1000))
+        self._last = now
+
+    def first_paint(self):
+        if self.first_paint_ms is not None:
+            return
+        self.mark("premier affichage")
+        self.first_paint_ms = self.phases[-1][2]
+        if self.first_paint_ms > self.budget_ms:
+            print(f"Démarrage : premier affichage en {self.first_paint_ms:.0f} ms "
+                  f"(budget {self.budget_ms} ms)")
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("Démarrage (ms)      phase   cumul")
+        for name, duration, total in self.phases:
+            print(f"  {name:<18}{duration:7.1f} {total:7.1f}")
+
+
+def default_snapshot_path():
+    return os.path.join(os.getcwd(), "assets", "cache", "playlist.json")
+
+
+def load_snapshot(folder, path=None):
+    """
+    Playlist enregistrée au dernier lancement pour ce dossier, ou None.
+    Sert uniquement à afficher la fenêtre tout de suite : le dossier est
+    relu ensuite.
+    """
+    path = path or default_snapshot_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != SNAPSHOT_VERSION or data.get("folder") != folder:
+        return None
+    return data
+
+
+def save_snapshot(folder, paths, current_index, path=None):
+    path = path or default_snapshot_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": SNAPSHOT_VERSION,
+            "folder": folder,
+            "paths": list(paths),
+            "current": current_index,
+        }, f, ensure_ascii=False)
+    os.replace(tmp, path)
@@ -0,0 +1,189 @@
+import shutil
+import subprocess
+import threading
+import numpy as np
+
+# Format PCM produit par ffmpeg pour le visualiseur : mono 16 bits
+STREAM_FRAME_RATE = 44100
+# Taille d'un bloc lu d'un coup depuis ffmpeg
+BLOCK_MS = 100
+# Avance maximale gardée en mémoire devant la position de lecture
+AHEAD_MS = 3000
+# Au-delà de cet écart on relance ffmpeg à la bonne position plutôt que
+# de décoder tout l'intervalle (cas d'un seek vers l'avant)
+SKIP_MS = 1000
+
+
+def ffmpeg_binary():
+    return shutil.which("ffmpeg") or shutil.which("avconv")
+
+
+def ffmpeg_available():
+    return ffmpeg_binary() is not None
+
+
+def ring_buffer_bytes(frame_rate=STREAM_FRAME_RATE, block_ms=BLOCK_MS, ahead_ms=AHEAD_MS):
+    """Mémoire occupée par le tampon circulaire d'un StreamingDecoder."""
+    capacity = max(2, ahead_ms // block_ms)
+    return capacity * max(1, frame_rate * block_ms // 1000) * 2
+
+
+def iter_pcm_blocks(path, frame_rate=STREAM_FRAME_RATE, block_samples=None, start_ms=0,
+                    process_holder=None, channels=1):
+    """
+    Décode le fichier avec ffmpeg et produit des blocs int16 de taille
+    fixe (le dernier bloc peut être plus court), mono par défaut ; avec
+    plusieurs canaux les échantillons sont entrelacés et block_samples
+    compte des trames. Rien d'autre que le bloc courant n'est gardé en
+    mémoire.
+    """
+    binary = ffmpeg_binary()
+    if binary is None:
+        raise RuntimeError("ffmpeg introuvable")
+    if block_samples is None:
+        block_samples = frame_rate * BLOCK_MS // 1000
+    cmd = [binary, "-nostdin", "-loglevel", "error"]
+    if start_ms > 0:
+        cmd += ["-ss", f"{start_ms / 1000:.3f}"]
+    cmd += ["-i", path, "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ac", str(channels), "-ar", str(frame_rate), "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if process_holder is not None:
+        process_holder.append(proc)
+    block_bytes = block_samples * channels * 2
+    try:
+        while True:
+            raw = proc.stdout.read(block_bytes)
+            if not raw:
+                break
+            yield np.frombuffer(raw[:len(raw) - len(raw) % (2 * channels)], dtype=np.int16)
+            if len(raw) < block_bytes:
+                break
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
+class StreamingDecoder:
+    """
+    Décodage en continu pour le visualiseur : un thread lit des blocs PCM
+    de taille fixe dans un tampon circulaire borné, juste devant la
+    position de lecture. Les blocs déjà consommés sont libérés, la mémoire
+    reste donc la même quelle que soit la durée de la piste.
+    """
+
+    def __init__(self, path, frame_rate=STREAM_FRAME_RATE, block_ms=BLOCK_MS, ahead_ms=AHEAD_MS):
+        self.path = path
+        self.frame_rate = frame_rate
+        self.block_samples = max(1, frame_rate * block_ms // 1000)
+        self.capacity = max(2, ahead_ms // block_ms)
+        self.skip_blocks = max(1, SKIP_MS // block_ms)
+
+        self._ring = np.zeros((self.capacity, self.block_samples), dtype=np.int16)
+        self._lengths = np.zeros(self.capacity, dtype=np.intp)
+        self._cond = threading.Condition()
+        self._first = 0      # numéro absolu du plus ancien bloc gardé
+        self._count = 0      # nombre de blocs disponibles dans l'anneau
+        self._eof = False
+        self._closed = False
+        self._generation = 0
+        self._processes = []
+        self._out = np.zeros(0, dtype=np.int16)
+        self._start(0)
+
+    def _start(self, first_block):
+        # Appelé sous self._cond (ou depuis __init__)
+        self._generation += 1
+        self._kill_processes()
+        self._first = first_block
+        self._count = 0
+        self._eof = False
+        start_ms = first_block * self.block_samples * 1000 // self.frame_rate
+        threading.Thread(
+            target=self._producer, args=(self._generation, start_ms), daemon=True
+        ).start()
+
+    def _kill_processes(self):
+        for proc in self._processes:
+            if proc.poll() is None:
+                proc.kill()
+        self._processes = []
+
+    def _producer(self, generation, start_ms):
+        try:
+            blocks = iter_pcm_blocks(
+                self.path, self.frame_rate, self.block_samples, start_ms, self._processes
+            )
+            for block in blocks:
+                with self._cond:
+                    while (self._count >= self.capacity
+                           and generation == self._generation and not self._closed):
+                        self._cond.wait()
+                    if generation != self._generation or self._closed:
+                        blocks.close()
+                        return
+                    slot = (self._first + self._count) % self.capacity
+                    self._ring[slot, :len(block)] = block
+                    self._lengths[slot] = len(block)
+                    self._count += 1
+                    self._cond.notify_all()
+        except Exception:
+            pass
+        with self._cond:
+            if generation == self._generation:
+                self._eof = True
+                self._cond.notify_all()
+
+    def read(self, position_ms, window_ms):
+        """
+        Retourne les échantillons [position, position + fenêtre) s'ils sont
+        déjà décodés, sinon None. Libère les blocs antérieurs à la position
+        et relance le décodage en cas de saut (seek).
+        """
+        start = int(position_ms) * self.frame_rate // 1000
+        length = max(1, int(window_ms) * self.frame_rate // 1000)
+        block = start // self.block_samples
+        with self._cond:
+            if self._closed:
+                return None
+            if block < self._first or block > self._first + self._count + self.skip_blocks:
+                if not (self._eof and block >= self._first + self._count):
+                    self._start(block)
+                return None
+
+            drop = min(block - self._first, self._count)
+            if drop > 0:
+                self._first += drop
+                self._count -= drop
+                self._cond.notify_all()
+            if block >= self._first + self._count:
+                return None
+
+            if len(self._out) != length:
+                self._out = np.zeros(length, dtype=np.int16)
+            out = self._out
+            filled = 0
+            offset = start - block * self.block_samples
+            b = block
+            while filled < length and b < self._first + self._count:
+                slot = b % self.capacity
+                available = self._lengths[slot] - offset
+                if available <= 0:
+                    break
+                n = min(available, length - filled)
+                out[filled:filled + n] = self._ring[slot, offset:offset + n]
+                filled += n
+                offset = 0
+                b += 1
+            if filled == 0:
+                return None
+            return out[:filled]
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._kill_processes()
+            self._cond.notify_all()
@@ -0,0 +1,82 @@
+import time
+import threading
+from collections import deque
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.actions import load_track_file, get_library
+from core import instrument
+
+
+class TrackLoader(QThread):
+    """
+    Charge les pistes hors du thread Qt. Chaque demande reçoit un numéro
+    de génération : une demande plus récente rend les précédentes
+    obsolètes, qui sont abandonnées dès que possible. Seule la dernière
+    piste demandée termine son chargement.
+    """
+    loaded_signal = pyqtSignal(int, int, object)
+    error_signal = pyqtSignal(int, str)
+
+    def __init__(self, visualizer):
+        super().__init__()
+        self.visualizer = visualizer
+        self.generation = 0
+        self.request_time = None
+        # Latences changement de piste -> premier son (ms)
+        self.latencies_ms = deque(maxlen=100)
+        self._pending = None
+        self._stopping = False
+        self._cond = threading.Condition()
+
+    def request(self, index, path):
+        with self._cond:
+            self.generation += 1
+            self.request_time = time.perf_counter()
+            self._pending = (self.generation, index, path)
+            self._cond.notify()
+            return self.generation
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def record_first_sound(self):
+        if self.request_time is None:
+            return None
+        latency = (time.perf_counter() - self.request_time) * 1000
+        self.request_time = None
+        self.latencies_ms.append(latency)
+        return latency
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                generation, index, path = self._pending
+                self._pending = None
+
+            try:
+                # Une demande obsolète ne doit pas couper la piste en cours
+                if not self.is_current(generation):
+                    continue
+                load_track_file(path)
+                if not self.is_current(generation):
+                    continue
+                with instrument.span("track.prepare"):
+                    prepared = self.visualizer.prepare_audio(path)
+                if not self.is_current(generation):
+                    self.visualizer.discard_audio(prepared)
+                    continue
+                self.loaded_signal.emit(generation, index, prepared)
+                # Index de trames pour les seeks, construit une fois par fichier
+                get_library().get_seek_index(path)
+            except Exception as e:
+                if self.is_current(generation):
+                    self.error_signal.emit(generation, str(e))
@@ -1,9 +1,18 @@
+import threading
+from collections import namedtuple
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
-import pyqtgraph as pg
-from pydub import AudioSegment
 import numpy as np
-from PyQt6.QtGui import QColor
 from PyQt6.QtCore import Qt
+from core import spectrum_cache, stream_decoder, waveform, instrument
+from core.bands import BandMapper, BarSmoother, intensity_to_offset
+from core.bar_renderer import create_renderer
+
+# Fenêtre d'analyse du rendu en direct
+WINDOW_MS = spectrum_cache.WINDOW_MS
+
+PreparedAudio = namedtuple(
+    "PreparedAudio", ["file_path", "num_bars", "spectrum", "stream", "segment"]
+)
 
 class AudioVisualizer(QWidget):
     def __init__(self, parent=None):
@@ -15,44 +24,51 @@ class AudioVisualizer(QWidget):
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
 
-        self.plot_widget = pg.PlotWidget()
-        self.plot_widget.setBackground(None) 
-        self.plot_widget.setYRange(0, 1)
-        self.plot_widget.setMouseEnabled(x=False, y=False)
-        self.plot_widget.hideAxis('bottom')
-        self.plot_widget.hideAxis('left')
-        self.plot_widget.getPlotItem().layout.setContentsMargins(0, 0, 0, 0)
-
-        self.layout.addWidget(self.plot_widget)
-
         # Valeurs par défaut
         self.num_bars = 30
         self.intensity = 1.0
         self.bar_width = 0.8
         self.color_start = (0, 255, 0) 
         self.color_end = (255, 0, 0)  
+        # "stream" : décodage par blocs en mémoire bornée, "full" : AudioSegment complet
+        self.decode_mode = "stream"
+        self.peak_hold = True
+        # "paint" : rendu QPainter léger, "pyqtgraph" : ancien rendu
+        self.renderer_name = "paint"
 
         self.data = np.zeros(self.num_bars)
-        self.x = np.arange(self.num_bars)
 
-        self.brushes = self._generate_brushes()
-        self.bar_graph = pg.BarGraphItem(
-            x=self.x, height=self.data, width=self.bar_width, brushes=self.brushes
-        )
-        self.plot_widget.addItem(self.bar_graph)
+        self.renderer = None
+        self._renderer_type = None
+        self._install_renderer()
+
+        self.frame_rate = stream_decoder.STREAM_FRAME_RATE
+        self.mapper = None
+        self._build_dsp()
 
         self.audio_segment = None
+        # Échantillons mono de la piste en mode "full" (tranches sans copie)
+        self.samples = None
+        self.file_path = None
+        # Spectre pré-calculé (mappé en mémoire), une ligne par HOP_MS
+        self.spectrum = None
+        self.stream = None
+        # Forme d'onde de la barre de progression : construite avec le spectre,
+        # ou seule si le spectre est déjà en cache
+        self.build_waveform = False
 
-    def _generate_brushes(self):
-        brushes = []
-        for i in range(self.num_bars):
-            ratio = i / max(self.num_bars - 1, 1)
-            r = int(self.color_start[0] * (1 - ratio) + self.color_end[0] * ratio)
-            g = int(self.color_start[1] * (1 - ratio) + self.color_end[1] * ratio)
-            b = int(self.color_start[2] * (1 - ratio) + self.color_end[2] * ratio)
-            color = QColor(r, g, b)
-            brushes.append(pg.mkBrush(color))
-        return brushes
+    def _install_renderer(self):
+        """(Re)crée le widget de rendu si le type choisi a changé, puis applique le style."""
+        if self.renderer is None or self.renderer_name != self._renderer_type:
+            if self.renderer is not None:
+                self.layout.removeWidget(self.renderer)
+                self.renderer.deleteLater()
+            self.renderer = create_renderer(self.renderer_name, self)
+            self._renderer_type = self.renderer_name
+            self.layout.addWidget(self.renderer)
+        self.renderer.set_style(
+            self.num_bars, self.bar_width, self.color_start, self.color_end, self.peak_hold
+        )
 
     def configure(self, config=None):
         """
@@ -64,6 +80,9 @@ class AudioVisualizer(QWidget):
             self.num_bars = vis_cfg.get("num_bars", 30)
             self.intensity = vis_cfg.get("intensity", 1.0)
             self.bar_width = vis_cfg.get("bar_width", 0.8) 
+            self.decode_mode = vis_cfg.get("decode_mode", "stream")
+            self.peak_hold = vis_cfg.get("peak_hold", True)
+            self.renderer_name = vis_cfg.get("renderer", "paint")
             colors = [
                 vis_cfg.get("color_start", "#00FF00"),
                 vis_cfg.get("color_end", "#FF0000"),
@@ -77,16 +96,38 @@ class AudioVisualizer(QWidget):
             self.bar_width = 0.8
             self.color_start = (0, 255, 0)
             self.color_end = (255, 0, 0)
+            self.decode_mode = "stream"
+            self.peak_hold = True
+            self.renderer_name = "paint"
 
-        self.x = np.arange(self.num_bars)
         self.data = np.zeros(self.num_bars)
-        self.plot_widget.clear()
+        self._install_renderer()
 
-        self.brushes = self._generate_brushes()
-        self.bar_graph = pg.BarGraphItem(
-            x=self.x, height=self.data, width=self.bar_width, brushes=self.brushes
-        )
-        self.plot_widget.addItem(self.bar_graph)
+        self._build_dsp()
+
+        # Le cache dépend de num_bars : on recharge celui qui correspond
+        self.spectrum = None
+        if self.file_path:
+            self._attach_spectrum(self.file_path, self.audio_segment)
+
+    def _build_dsp(self, frame_rate=None):
+        """
+        (Re)construit l'opérateur de bandes et le lissage ; seulement quand
+        num_bars ou la fréquence d'échantillonnage changent.
+        """
+        if frame_rate is not None:
+            self.frame_rate = frame_rate
+        window = self.frame_rate * WINDOW_MS // 1000
+        if (self.mapper is None or self.mapper.num_bars != self.num_bars
+                or self.mapper.frame_rate != self.frame_rate):
+            self.mapper = BandMapper(self.num_bars, self.frame_rate, window)
+            self.smoother = BarSmoother(self.num_bars)
+            self._levels = np.zeros(self.num_bars)
+            self._silence = np.zeros(self.num_bars)
+            self._interp = np.zeros(self.num_bars)
+            self._interp_tmp = np.zeros(self.num_bars)
+        self.gain_offset = intensity_to_offset(self.intensity)
+        self.data = self.smoother.values
 
     def _color_to_rgb(self, color):
         """
@@ -103,39 +144,162 @@ class AudioVisualizer(QWidget):
             )
         return (0, 255, 0)  
 
+    def prepare_audio(self, file_path):
+        """
+        Partie lourde du chargement (cache, décodage), sans toucher au
+        widget : peut tourner hors du thread Qt.
+        """
+        num_bars = self.num_bars
+        cached = spectrum_cache.load_cached(file_path, num_bars)
+        if cached is not None:
+            return PreparedAudio(file_path, num_bars, cached, None, None)
+        if self.decode_mode == "stream" and stream_decoder.ffmpeg_available():
+            stream = stream_decoder.StreamingDecoder(file_path)
+            return PreparedAudio(file_path, num_bars, None, stream, None)
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(file_path)
+        return PreparedAudio(file_path, num_bars, None, None, segment)
+
+    def prepare_cost_bytes(self, file_path, duration_ms, sample_rate, channels):
+        """Mémoire qu'occuperait prepare_audio pour ce fichier (estimation)."""
+        if spectrum_cache.load_cached(file_path, self.num_bars) is not None:
+            # Mappé en mémoire : les pages sont lues à la demande
+            return 0
+        if self.decode_mode == "stream" and stream_decoder.ffmpeg_available():
+            return stream_decoder.ring_buffer_bytes()
+        return duration_ms * max(sample_rate, 1) * max(channels, 1) * 2 // 1000
+
+    def attach_audio(self, prepared):
+        """Installe une piste préparée par prepare_audio (thread Qt)."""
+        self._close_stream()
+        self.file_path = prepared.file_path
+        self.audio_segment = prepared.segment
+        self.stream = prepared.stream
+        self.samples = None
+        if prepared.segment is not None:
+            self.samples = spectrum_cache.segment_to_mono(prepared.segment)
+            self._build_dsp(prepared.segment.frame_rate)
+        elif prepared.stream is not None:
+            self._build_dsp(prepared.stream.frame_rate)
+        self.spectrum = None
+        if prepared.spectrum is not None and prepared.num_bars == self.num_bars:
+            self.spectrum = prepared.spectrum
+            self.ensure_waveform(prepared.file_path)
+        else:
+            self._attach_spectrum(prepared.file_path, prepared.segment)
+
+    @staticmethod
+    def discard_audio(prepared):
+        if prepared.stream is not None:
+            prepared.stream.close()
+
     def load_audio(self, file_path):
-        self.audio_segment = AudioSegment.from_file(file_path)
+        self.attach_audio(self.prepare_audio(file_path))
 
-    def update_visualizer(self, position_ms):
-        if self.audio_segment is None:
-            self.data = np.zeros(self.num_bars)
-            self.bar_graph.setOpts(height=self.data)
-            return
+    def _close_stream(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
 
-        window_size = 100 
-        start = int(position_ms)
-        end = min(start + window_size, len(self.audio_segment))
+    def _attach_spectrum(self, file_path, segment=None):
+        """
+        Utilise le spectre en cache s'il existe. Sinon lance l'analyse en
+        arrière-plan (en réutilisant le son déjà décodé si on l'a) ; le
+        rendu en direct sert en attendant.
+        """
+        num_bars = self.num_bars
+        cached = spectrum_cache.load_cached(file_path, num_bars)
+        if cached is not None:
+            self.spectrum = cached
+            self.ensure_waveform(file_path)
+            return
+        build_waveform = self.build_waveform
 
-        chunk = self.audio_segment[start:end]
-        samples = np.array(chunk.get_array_of_samples())
+        def worker():
+            # Même passe de décodage pour la forme d'onde de la barre de progression
+            builder = None
+            if waveform.claim_build(file_path):
+                if waveform.load_cached(file_path) is None:
+                    builder = waveform.PeakBuilder()
+                else:
+                    waveform.release_build(file_path)
+            try:
+                result = spectrum_cache.analyze_file(
+                    file_path, num_bars, segment=segment, peaks=builder
+                )
+                # Vide si le spectre était finalement déjà en cache
+                if builder is not None and not builder.is_empty():
+                    waveform.save_pyramid(builder.build(), file_path)
+            except Exception:
+                return
+            finally:
+                if builder is not None:
+                    waveform.release_build(file_path)
+            # La piste ou le nombre de barres a pu changer entre-temps
+            if self.file_path == file_path and self.num_bars == num_bars:
+                self.spectrum = result
+            if builder is not None and builder.is_empty() and build_waveform:
+                try:
+                    waveform.analyze_file(file_path)
+                except Exception:
+                    pass
 
-        if chunk.channels == 2:
-            samples = samples[::2]
+        threading.Thread(target=worker, daemon=True).start()
 
-        if len(samples) == 0:
-            self.data = np.zeros(self.num_bars)
-            self.bar_graph.setOpts(height=self.data)
+    def ensure_waveform(self, file_path):
+        """Spectre déjà en cache : décode la piste pour la seule forme d'onde si elle manque."""
+        if not self.build_waveform:
             return
 
-        fft = np.abs(np.fft.rfft(samples))
-        max_fft = np.max(fft)
-        if max_fft != 0:
-            fft = fft / max_fft
-        fft = fft * self.intensity
+        def worker():
+            try:
+                if waveform.load_cached(file_path) is None:
+                    waveform.analyze_file(file_path)
+            except Exception:
+                pass
 
-        bins = np.array_split(fft, self.num_bars)
-        magnitudes = np.array([np.mean(b) for b in bins])
-        magnitudes = np.clip(magnitudes, 0, 1)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def update_visualizer(self, position_ms, steps=1.0):
+        """
+        Calcule et affiche une trame. steps : temps écoulé depuis la trame
+        précédente, en pas de 50 ms.
+        """
+        with instrument.span("visualizer.compute"):
+            self._compute_frame(position_ms, steps)
+        self.renderer.set_values(self.data, self.smoother.peaks if self.peak_hold else None)
+
+    def _compute_frame(self, position_ms, steps):
+        levels = None
+        spectrum = self.spectrum
+        if spectrum is not None:
+            # Le spectre complet est prêt : le décodage en continu ne sert plus
+            self._close_stream()
+            pos = max(0.0, position_ms / spectrum_cache.HOP_MS)
+            idx = int(pos)
+            if idx + 1 < len(spectrum):
+                # Interpolation entre deux trames pour les affichages > 20 images/s
+                t = pos - idx
+                np.multiply(spectrum[idx], 1 - t, out=self._interp)
+                np.multiply(spectrum[idx + 1], t, out=self._interp_tmp)
+                self._interp += self._interp_tmp
+                levels = self._interp
+            elif idx < len(spectrum):
+                levels = spectrum[idx]
+        else:
+            if self.stream is not None:
+                samples = self.stream.read(position_ms, WINDOW_MS)
+            elif self.samples is not None:
+                start = int(position_ms) * self.frame_rate // 1000
+                samples = self.samples[start:start + self.mapper.window_size]
+            else:
+                samples = None
+            if samples is not None and len(samples) > 0:
+                levels = self.mapper.process(samples, self._levels)
+
+        if levels is None:
+            self.smoother.step_towards(self._silence, steps)
+        else:
+            self.smoother.update(levels, self.gain_offset, steps)
 
-        self.data = magnitudes
-        self.bar_graph.setOpts(height=self.data)
+        self.data = self.smoother.values
@@ -0,0 +1,173 @@
+import os
+import sys
+import struct
+import ctypes
+import ctypes.util
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+from core.library import SUPPORTED_EXTENSIONS
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+POLL_INTERVAL_MS = 2000
+
+
+def _is_music(name):
+    return name.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+class FolderWatcher(QObject):
+    """
+    Interface commune : signale les fichiers audio ajoutés, supprimés ou
+    renommés dans un dossier. resync_signal demande un rescan complet
+    (quand des événements ont été perdus).
+    """
+    added_signal = pyqtSignal(str)
+    removed_signal = pyqtSignal(str)
+    renamed_signal = pyqtSignal(str, str)
+    resync_signal = pyqtSignal()
+
+    def __init__(self, folder, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+
+    def stop(self):
+        pass
+
+
+class InotifyWatcher(FolderWatcher):
+    """Événements inotify lus depuis la boucle Qt (QSocketNotifier), sans thread."""
+
+    def __init__(self, folder, parent=None):
+        super().__init__(folder, parent)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mask = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+                | IN_DELETE_SELF | IN_MOVE_SELF)
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(folder), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, "inotify_add_watch")
+        self._notifier = QSocketNotifier(self._fd, QSocketNotifier.Type.Read, self)
+        self._notifier.activated.connect(self._read_events)
+
+    def _read_events(self):
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        except OSError:
+            self.stop()
+            return
+
+        moved_from = {}
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(buf):
+            _, mask, cookie, length = _EVENT_HEADER.unpack_from(buf, pos)
+            pos += _EVENT_HEADER.size
+            name = os.fsdecode(buf[pos:pos + length].rstrip(b"\0"))
+            pos += length
+
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                self.resync_signal.emit()
+                continue
+            path = os.path.join(self.folder, name)
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = path
+            elif mask & IN_MOVED_TO:
+                old = moved_from.pop(cookie, None)
+                if old is not None and _is_music(old) and _is_music(path):
+                    self.renamed_signal.emit(old, path)
+                else:
+                    # Téléchargement terminé (fichier .part renommé) ou renommage vers/depuis un autre type
+                    if old is not None and _is_music(old):
+                        self.removed_signal.emit(old)
+                    if _is_music(path):
+                        self.added_signal.emit(path)
+            elif mask & IN_CLOSE_WRITE:
+                if _is_music(path):
+                    self.added_signal.emit(path)
+            elif mask & IN_DELETE:
+                if _is_music(path):
+                    self.removed_signal.emit(path)
+
+        # Déplacés hors du dossier
+        for path in moved_from.values():
+            if _is_music(path):
+                self.removed_signal.emit(path)
+
+    def stop(self):
+        if self._fd >= 0:
+            self._notifier.setEnabled(False)
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(FolderWatcher):
+    """
+    Repli sans inotify : compare périodiquement le contenu du dossier.
+    Un nouveau fichier n'est annoncé qu'une fois sa taille stable.
+    """
+
+    def __init__(self, folder, parent=None, interval_ms=POLL_INTERVAL_MS):
+        super().__init__(folder, parent)
+        self._known = self._snapshot()
+        self._pending = {}
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._poll)
+        self._timer.start()
+
+    def _snapshot(self):
+        result = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if _is_music(entry.name) and entry.is_file():
+                        result[entry.path] = entry.stat().st_size
+        except OSError:
+            pass
+        return result
+
+    def _poll(self):
+        current = self._snapshot()
+        for path in self._known.keys() - current.keys():
+            self._pending.pop(path, None)
+            self.removed_signal.emit(path)
+        known = {p: s for p, s in self._known.items() if p in current}
+        for path, size in current.items():
+            if path in known:
+                continue
+            if self._pending.get(path) == size:
+                del self._pending[path]
+                known[path] = size
+                self.added_signal.emit(path)
+            else:
+                self._pending[path] = size
+        self._known = known
+
+    def stop(self):
+        self._timer.stop()
+
+
+def create_folder_watcher(folder, parent=None):
+    """inotify sous Linux, sinon scrutation périodique."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folder, parent)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(folder, parent)
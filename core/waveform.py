@@ -0,0 +1,202 @@
+import os
+import threading
+import numpy as np
+from core import stream_decoder
+from core.spectrum_cache import cached_file_hash, segment_to_mono
+
+# Échantillons résumés par un couple (min, max) au niveau le plus fin
+BASE_SAMPLES = 256
+# À incrémenter quand le contenu des fichiers en cache change
+WAVEFORM_VERSION = 1
+
+# Pistes en cours d'analyse : une piste n'est jamais analysée deux fois en parallèle
+_building = set()
+_building_cond = threading.Condition()
+# Appelés (depuis le thread d'analyse) avec (chemin, pyramide) à chaque construction
+_listeners = []
+
+
+def default_cache_dir():
+    return os.path.join(os.getcwd(), "assets", "cache", "waveform")
+
+
+def cache_path(digest, cache_dir=None):
+    cache_dir = cache_dir or default_cache_dir()
+    return os.path.join(cache_dir, f"{digest}_v{WAVEFORM_VERSION}_{BASE_SAMPLES}.npy")
+
+
+def claim_build(path):
+    """Vrai si l'appelant doit construire la pyramide, faux si une autre analyse s'en charge."""
+    with _building_cond:
+        if path in _building:
+            return False
+        _building.add(path)
+        return True
+
+
+def release_build(path):
+    with _building_cond:
+        _building.discard(path)
+        _building_cond.notify_all()
+
+
+def add_listener(callback):
+    """callback(chemin, pyramide) est appelé, hors du thread Qt, après chaque construction."""
+    _listeners.append(callback)
+
+
+def level_lengths(base_length):
+    """Longueur de chaque niveau : divisée par 2 jusqu'à un seul couple."""
+    lengths = [base_length]
+    while lengths[-1] > 1:
+        lengths.append((lengths[-1] + 1) // 2)
+    return lengths
+
+
+class PeakBuilder:
+    """
+    Construit le niveau de base (min/max par tranche de BASE_SAMPLES) à
+    partir de blocs PCM int16 mono reçus au fil du décodage.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._carry = np.zeros(0, dtype=np.int16)
+
+    def feed(self, block):
+        data = np.concatenate((self._carry, block)) if len(self._carry) else block
+        usable = len(data) // BASE_SAMPLES * BASE_SAMPLES
+        self._carry = data[usable:].copy()
+        if usable:
+            frames = data[:usable].reshape(-1, BASE_SAMPLES)
+            self._chunks.append(np.stack((frames.min(axis=1), frames.max(axis=1)), axis=1))
+
+    def is_empty(self):
+        return not self._chunks and not len(self._carry)
+
+    def tee(self, blocks):
+        """Laisse passer les blocs en les résumant au passage."""
+        for block in blocks:
+            self.feed(block)
+            yield block
+
+    def build(self):
+        """Retourne la pyramide complète, niveaux concaténés, forme (total, 2) int16."""
+        chunks = list(self._chunks)
+        if len(self._carry):
+            chunks.append(np.array([[self._carry.min(), self._carry.max()]], dtype=np.int16))
+        base = np.concatenate(chunks) if chunks else np.zeros((1, 2), dtype=np.int16)
+        levels = [base]
+        while len(levels[-1]) > 1:
+            prev = levels[-1]
+            if len(prev) % 2:
+                prev = np.concatenate((prev, prev[-1:]))
+            pairs = prev.reshape(-1, 2, 2)
+            levels.append(np.stack((pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)), axis=1))
+        return np.concatenate(levels).astype(np.int16)
+
+
+class WaveformPyramid:
+    """
+    Pics min/max à plusieurs résolutions (chaque niveau divise par 2).
+    peaks(width) ne lit qu'environ width couples, quelle que soit la
+    durée de la piste.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        # Total d'une pyramide = somme des longueurs des niveaux : on retrouve la base
+        lo, hi = 1, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if sum(level_lengths(mid)) < len(data):
+                lo = mid + 1
+            else:
+                hi = mid
+        base_length = lo
+        self.levels = []
+        start = 0
+        for length in level_lengths(base_length):
+            self.levels.append(data[start:start + length])
+            start += length
+
+    def peaks(self, width):
+        """(mins, maxs) en float32 dans [-1, 1], width colonnes."""
+        width = max(1, int(width))
+        # Le niveau le plus grossier qui garde au moins une valeur par colonne
+        level = self.levels[0]
+        for candidate in self.levels:
+            if len(candidate) < width:
+                break
+            level = candidate
+        level = np.asarray(level)
+        if len(level) >= width:
+            edges = np.arange(width) * len(level) // width
+            mins = np.minimum.reduceat(level[:, 0], edges)
+            maxs = np.maximum.reduceat(level[:, 1], edges)
+        else:
+            idx = np.arange(width) * len(level) // width
+            mins, maxs = level[idx, 0], level[idx, 1]
+        return mins.astype(np.float32) / 32768.0, maxs.astype(np.float32) / 32768.0
+
+
+def load_cached(path, cache_dir=None, digest=None):
+    """Pyramide mappée en mémoire si elle existe déjà, sinon None."""
+    try:
+        digest = digest or cached_file_hash(path)
+    except OSError:
+        return None
+    target = cache_path(digest, cache_dir)
+    if not os.path.isfile(target):
+        return None
+    try:
+        return WaveformPyramid(np.load(target, mmap_mode="r"))
+    except (OSError, ValueError):
+        return None
+
+
+def save_pyramid(data, path, cache_dir=None, digest=None):
+    digest = digest or cached_file_hash(path)
+    target = cache_path(digest, cache_dir)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, data)
+    os.replace(tmp, target)
+    pyramid = WaveformPyramid(np.load(target, mmap_mode="r"))
+    for callback in list(_listeners):
+        callback(path, pyramid)
+    return pyramid
+
+
+def analyze_file(path, cache_dir=None, segment=None):
+    """
+    Décode la piste (en flux si possible) et enregistre sa pyramide. Si
+    l'analyse du spectre la construit déjà, attend simplement son résultat.
+    """
+    digest = cached_file_hash(path)
+    with _building_cond:
+        while path in _building:
+            _building_cond.wait()
+        _building.add(path)
+    try:
+        cached = load_cached(path, cache_dir, digest=digest)
+        if cached is not None:
+            return cached
+        return _analyze(path, cache_dir, segment, digest)
+    finally:
+        release_build(path)
+
+
+def _analyze(path, cache_dir, segment, digest):
+    builder = PeakBuilder()
+    if segment is not None:
+        builder.feed(segment_to_mono(segment).astype(np.int16))
+    elif stream_decoder.ffmpeg_available():
+        for block in stream_decoder.iter_pcm_blocks(path):
+            builder.feed(block)
+    else:
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(path).set_sample_width(2)
+        builder.feed(segment_to_mono(segment).astype(np.int16))
+    return save_pyramid(builder.build(), path, cache_dir, digest=digest)
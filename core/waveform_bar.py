@@ -0,0 +1,102 @@
+import threading
+from PyQt6.QtWidgets import QProgressBar
+from PyQt6.QtCore import Qt, QLineF, QMetaObject
+from PyQt6.QtGui import QPainter, QColor, QPen
+
+
+class WaveformBar(QProgressBar):
+    """
+    Barre de progression qui dessine la forme d'onde de la piste à partir
+    de sa pyramide de pics (voir core.waveform) : un repaint ne lit
+    qu'environ width couples min/max, jamais le PCM. Tant que la
+    pyramide n'est pas prête, la barre classique est affichée.
+    """
+
+    def __init__(self, color="#d09dd2", background="#350b4a", radius=10, parent=None):
+        super().__init__(parent)
+        self.set_style(color, background, radius)
+        self.pyramid = None
+        self._path = None
+        self._lines = None
+        self._lines_key = None
+        self._listening = False
+
+    def set_style(self, color, background, radius):
+        self.color = QColor(color)
+        self.rest_color = QColor(color)
+        self.rest_color.setAlpha(90)
+        self.background = QColor(background)
+        self.radius = radius
+        self.update()
+
+    def set_track(self, path):
+        """
+        Affiche la forme d'onde en cache (recherchée hors du thread Qt). Sinon
+        elle arrive de l'analyse du visualiseur, qui la construit pendant le
+        même décodage que le spectre : la barre ne décode jamais elle-même.
+        """
+        if path == self._path:
+            return
+        self._path = path
+        self.pyramid = None
+        self._lines = None
+        if path is None:
+            self.update()
+            return
+        # Import différé (numpy) : la barre s'affiche avant
+        from core import waveform
+        if not self._listening:
+            waveform.add_listener(self._on_built)
+            self._listening = True
+
+        def worker():
+            try:
+                cached = waveform.load_cached(path)
+            except Exception:
+                return
+            if cached is not None:
+                self._on_built(path, cached)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_built(self, path, pyramid):
+        # Thread d'analyse : la piste affichée a pu changer entre-temps
+        if self._path == path:
+            self.pyramid = pyramid
+            QMetaObject.invokeMethod(self, "update", Qt.ConnectionType.QueuedConnection)
+
+    def _column_lines(self, pyramid, width, height):
+        key = (id(pyramid), width, height)
+        if self._lines_key != key:
+            mins, maxs = pyramid.peaks(width)
+            # Normalisé sur le pic de la piste pour rester lisible
+            top = max(float(maxs.max()), float(-mins.min()), 1e-3)
+            mid = height / 2
+            self._lines = [
+                QLineF(x + 0.5, mid - maxs[x] / top * mid, x + 0.5, mid - mins[x] / top * mid)
+                for x in range(width)
+            ]
+            self._lines_key = key
+        return self._lines
+
+    def paintEvent(self, event):
+        pyramid = self.pyramid
+        if pyramid is None:
+            super().paintEvent(event)
+            return
+        w, h = self.width(), self.height()
+        span = max(1, self.maximum() - self.minimum())
+        played = int(w * (self.value() - self.minimum()) / span)
+        lines = self._column_lines(pyramid, w, h)
+
+        painter = QPainter(self)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.background)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.drawRoundedRect(self.rect(), self.radius, self.radius)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        painter.setPen(QPen(self.color, 1))
+        painter.drawLines(lines[:played])
+        painter.setPen(QPen(self.rest_color, 1))
+        painter.drawLines(lines[played:])
+        painter.end()
@@ -1,20 +1,36 @@
+import time
+_START = time.perf_counter()
 import sys
 import os
 import json
+import copy
 import subprocess
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QProgressBar, QListWidget, QSlider
+    QPushButton, QLabel, QListView, QSlider
 )
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QPixmap, QFont
+from PyQt6.QtCore import Qt, QTimer, QSize
+from PyQt6.QtGui import QFont, QIcon, QShortcut, QKeySequence
 from core.actions import (
-    load_playlist_from_folder, play_music, pause_music, stop_music,
-    load_track_by_index, get_current_position_ms, get_current_track_duration_ms,
+    play_music, pause_music, stop_music,
+    get_current_position_ms, get_current_track_duration_ms,
     set_volume, playlist, get_current_track_name, get_current_index, set_current_index,
-    seek_to_position
+    seek_to_position, get_library, queue_track, advance_to_queued, init_audio
 )
-from core.visualizer import AudioVisualizer
+from core.playlist_model import PlaylistModel
+from core.waveform_bar import WaveformBar
+from core.scheduler import RefreshScheduler
+from core.startup import StartupProfiler, profiling_requested, load_snapshot, save_snapshot
+from core import actions
+from core.watcher import create_folder_watcher, POLL_INTERVAL_MS
+from core.download_cache import DownloadCache, default_cache_path
+from core.single_instance import SingleInstance
+from core.config_reload import ConfigWatcher, changed_sections
+from core.image_cache import get_image_cache
+from core.animation import AnimationClock, AnimatedImage, get_frame_set, is_animated
+from core import instrument
+from core.debug_hud import DebugHud
+from core.remote import daemon_running
 import pygame  # Assure-toi que pygame est importé ici
 
 
@@ -23,7 +39,19 @@ def ms_to_mmss(ms: int) -> str:
     return f"{seconds // 60:02}:{seconds % 60:02}"
 
 
-def load_config(path="config.json") -> dict:
+CONFIG_PATH = "config.json"
+
+
+def folder_id(path):
+    """(périphérique, inode) du dossier, None s'il n'existe plus."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+def load_config(path=CONFIG_PATH) -> dict:
     if not os.path.isfile(path):
         return {}
     with open(path, "r", encoding="utf-8") as f:
@@ -38,20 +66,131 @@ class MusicApp(QWidget):
         self.is_looping = False
         self.track_finished = False
         self._drag_pos = None
+        self._loading = False
+        # Position (ms) cliquée pendant un chargement, appliquée une fois la piste prête
+        self._pending_seek = None
+        # Préchargement de la piste suivante pour un enchaînement sans blanc
+        self._prefetch_target = -1
+        self._prefetched = None
+        self._prefetch_ready = False
+        self._load_started = 0
+
+        self.visualizer = None
+        self.loader = None
+        self.config_window = None
+        self.research_window = None
+        self.instance_guard = None
+        self.profiler = StartupProfiler(_START, profiling_requested())
+        self.profiler.mark("imports")
 
         self.setup_window()
         self.setup_ui()
+
+        # Mesures (ticks, visualiseur, chargements, seeks, téléchargements) :
+        # NYRVANA_INSTRUMENT=1 ou "debug": {"instrument": true} ; F12 affiche le relevé
+        self.hud = DebugHud(self)
+        self.hud_shortcut = QShortcut(QKeySequence("F12"), self)
+        self.hud_shortcut.activated.connect(self.hud.toggle)
+        self.apply_debug_config()
+
+        # Rafraîchissement adaptatif : rien en pause, ralenti quand la fenêtre est cachée
+        self.scheduler = RefreshScheduler(
+            self,
+            is_active=lambda: self.is_playing and bool(playlist),
+            on_text=self.update_progress,
+            on_frame=self.update_frame,
+            max_fps=self.config.get("visualizer", {}).get("max_fps", 60),
+        )
+
+        # Fenêtre affichée d'abord depuis la playlist du dernier lancement ;
+        # audio, visualiseur, analyses et relecture du dossier viennent ensuite
+        self.music_dir = os.path.join(os.getcwd(), "assets", "music")
+        self._snapshot = load_snapshot(self.music_dir)
+        if self._snapshot is not None:
+            self.playlist_model.load_snapshot(self._snapshot["paths"])
+            current = self._snapshot.get("current", 0)
+            if 0 <= current < len(playlist):
+                self.track_label.setText(os.path.basename(playlist[current]))
+        self.profiler.mark("fenêtre")
+        self.show()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.profiler.first_paint_ms is None:
+            self.profiler.first_paint()
+            # Le reste du démarrage passe après ce premier affichage
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        from core.visualizer import AudioVisualizer
+        from core.track_loader import TrackLoader
+        from core.prefetch import Prefetcher
+        from core.loudness_scanner import LoudnessScanner
+        from core.library_scanner import LibraryScanner
+        self.profiler.mark("imports différés")
+
+        init_audio()
+        self.profiler.mark("audio")
+
+        self.visualizer = AudioVisualizer()
+        self.visualizer.configure(self.config)
+        self.visualizer.build_waveform = self.show_waveform
+        self.layout().replaceWidget(self.visualizer_slot, self.visualizer)
+        self.visualizer_slot.deleteLater()
+        self.hud.raise_()
+        self.profiler.mark("visualiseur")
+
+        self.loader = TrackLoader(self.visualizer)
+        self.loader.loaded_signal.connect(self.on_track_loaded)
+        self.loader.error_signal.connect(self.on_track_error)
+        self.loader.start()
+
+        self.apply_playback_config()
+        pb_cfg = self.config.get("playback", {})
+        budget = int(pb_cfg.get("prefetch_budget_mb", 64) * 1024 * 1024)
+        self.prefetcher = Prefetcher(self.visualizer, get_library(self.music_dir), budget)
+        self.prefetcher.ready_signal.connect(self.on_prefetched)
+        self.prefetcher.start()
+
+        self.loudness_scanner = LoudnessScanner(get_library(), pb_cfg.get("loudness_workers"))
+        self.loudness_scanner.measured_signal.connect(self.on_loudness_measured)
+        self.loudness_scanner.start()
+
+        self.library_scanner = LibraryScanner(get_library(self.music_dir))
+        self.library_scanner.scanned_signal.connect(self.on_library_scanned)
+        self.library_scanner.start()
+        self.profiler.mark("threads")
+
         self.load_music()
+        self.profiler.mark("bibliothèque")
 
-        self.timer = QTimer()
-        self.timer.setInterval(50)
-        self.timer.timeout.connect(self.update_progress)
-        self.timer.start()
+        # Les fichiers ajoutés/supprimés dans assets/music sont appliqués au fil de l'eau
+        self.folder_timer = QTimer(self)
+        self.folder_timer.setInterval(POLL_INTERVAL_MS)
+        self.folder_timer.timeout.connect(self.rearm_folder_watcher)
+        self.watch_music_folder()
+        # Garde le cache de téléchargement synchronisé avec les suppressions
+        self.download_cache = DownloadCache(default_cache_path(self.music_dir))
+        # Thème modifié (fenêtre de configuration ou éditeur) : appliqué sans redémarrer
+        self.config_watcher = ConfigWatcher(CONFIG_PATH, self)
+        self.config_watcher.changed_signal.connect(self.apply_config)
 
         self.on_volume_change(self.volume_slider.value())
-        self.show()
+        self.profiler.mark("prêt")
+        self.profiler.report()
 
     def setup_window(self):
+        self.setWindowFlag(Qt.WindowType.WindowMinimizeButtonHint, True)
+        self.setWindowFlag(Qt.WindowType.WindowMaximizeButtonHint, False)
+        self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
+        self.bg_label = None
+        # GIF animés (fond, boutons) : une horloge pour toute la fenêtre
+        self.animations = {}
+        self.animation_clock = AnimationClock(self)
+        self.apply_window_style()
+
+    def apply_window_style(self):
+        """Taille, couleur et image de fond (section window)."""
         cfg = self.config.get("window", {})
         width = cfg.get("width", 270)
         height = cfg.get("height", 450)
@@ -61,18 +200,42 @@ class MusicApp(QWidget):
         bg_color = cfg.get("background_color", "#9141ac")
         self.setStyleSheet(f"background-color: {bg_color};")
 
-        self.setWindowFlag(Qt.WindowType.WindowMinimizeButtonHint, True)
-        self.setWindowFlag(Qt.WindowType.WindowMaximizeButtonHint, False)
-        self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
-
         bg_path = cfg.get("background_image_path", "")
-        if bg_path and os.path.isfile(bg_path):
-            pixmap = QPixmap(bg_path).scaled(width, height, Qt.AspectRatioMode.KeepAspectRatioByExpanding)
+        if self.bg_label is None:
             self.bg_label = QLabel(self)
-            self.bg_label.setPixmap(pixmap)
+            self.bg_label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+            self.bg_label.hide()
+        if self._show_image(self.bg_label, bg_path, width, height, self.bg_label.setPixmap):
             self.bg_label.setGeometry(0, 0, width, height)
             self.bg_label.lower()
-            self.bg_label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+            self.bg_label.show()
+        else:
+            self.bg_label.hide()
+
+    def _show_image(self, widget, path, width, height, show, crop=False):
+        """
+        Affiche une image de thème via show(pixmap) : image fixe depuis le
+        cache (déjà à la bonne taille), ou GIF animé joué par l'horloge
+        commune. Retourne False si rien n'est affiché.
+        """
+        previous = self.animations.pop(widget, None)
+        if previous is not None:
+            self.animation_clock.remove(previous)
+        if not path or not os.path.isfile(path):
+            return False
+        dpr = widget.devicePixelRatioF()
+        if is_animated(path):
+            animation = AnimatedImage(get_frame_set(path, width, height, dpr, crop), show)
+            if animation.frames.frame_at(0)[0] is None:
+                return False
+            self.animations[widget] = animation
+            self.animation_clock.add(animation)
+            return True
+        pixmap = get_image_cache().pixmap(path, width, height, dpr, crop)
+        if pixmap is None:
+            return False
+        show(pixmap)
+        return True
 
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
@@ -93,25 +256,16 @@ class MusicApp(QWidget):
         title_bar.addWidget(self.title)
         title_bar.addStretch()
 
+        # Symbole de chaque bouton, pour pouvoir les restyler à chaud
+        self.title_buttons = []
+        self.button_symbols = {}
+
         def create_btn_from_config(symbol, callback):
             cfg = self.config.get("buttons", {}).get("rewind_backward", {})
-            size = cfg.get("size", [30, 30])
-            color = cfg.get("color", "#ffffff")
-            text_color = cfg.get("text_color", "#000000")
-            shape = cfg.get("shape", "")
-            border_radius = 8 if shape == "rounded" else 0
-            image_path = cfg.get("image_path", "")
-
             btn = QPushButton(symbol)
-            btn.setFont(self.app_font)
-            btn.setFixedSize(*size)
-
-            if image_path and os.path.isfile(image_path):
-                btn.setText("")
-                btn.setStyleSheet(f"background-color: {color}; border-radius: {border_radius}px; background-image: url({image_path}); background-repeat: no-repeat; background-position: center; border: none;")
-            else:
-                btn.setStyleSheet(f"background-color: {color}; color: {text_color}; border-radius: {border_radius}px;")
+            self._style_button(btn, symbol, cfg, "#ffffff", cfg.get("text_color", "#000000"))
             btn.clicked.connect(callback)
+            self.title_buttons.append((btn, symbol))
             return btn
 
         self.config_button = create_btn_from_config("☼", self.launch_config_ui)
@@ -124,24 +278,14 @@ class MusicApp(QWidget):
             title_bar.addWidget(btn)
         main_layout.addLayout(title_bar)
 
-        self.list_widget = QListWidget()
-        self.list_widget.setFont(self.app_font)
-        self.list_widget.clicked.connect(self.select_track)
-        pb_cfg = self.config.get("progress_bar", {})
-        progress_bg_color = pb_cfg.get("background_color", "#350b4a")
-        
-        
-        self.list_widget.setStyleSheet(f"""
-            QListWidget::item:selected {{
-                background: {progress_bg_color};
-                color: white;
-            }}
-            QListWidget::item:selected:!active {{
-                background: {progress_bg_color};
-                color: white;
-            }}
-        """)
-        main_layout.addWidget(self.list_widget)
+        # Vue virtualisée : seules les lignes visibles sont construites
+        self.playlist_model = PlaylistModel(self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.playlist_model)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setFont(self.app_font)
+        self.list_view.clicked.connect(self.select_track)
+        main_layout.addWidget(self.list_view)
 
         self.track_label = QLabel("")
         self.track_label.setFont(self.app_font)
@@ -149,17 +293,10 @@ class MusicApp(QWidget):
         self.track_label.setStyleSheet("color: white; background: transparent;")
         main_layout.addWidget(self.track_label)
 
-        self.progress_bar = QProgressBar()
+        self.progress_bar = WaveformBar()
         self.progress_bar.setRange(0, 1000)
         self.progress_bar.setTextVisible(False)
-        pb_cfg = self.config.get("progress_bar", {})
-        chunk_color = pb_cfg.get("color", "#d09dd2")
-        bg_color = pb_cfg.get("background_color", "#350b4a")
-        radius = pb_cfg.get("radius", 10)
-        height = pb_cfg.get("height", 10)
-
-        self.progress_bar.setFixedHeight(height)
-        self.progress_bar.setStyleSheet(f"QProgressBar {{background-color: {bg_color}; border-radius: {radius}px;}} QProgressBar::chunk {{background-color: {chunk_color}; border-radius: {radius}px;}}");
+        self.apply_progress_style()
         self.progress_bar.mousePressEvent = self.progress_clicked
         main_layout.addWidget(self.progress_bar)
 
@@ -167,20 +304,11 @@ class MusicApp(QWidget):
 
         def create_btn(name, symbol, handler):
             cfg = self.config.get("buttons", {}).get(name, {})
-            size = cfg.get("size", [30, 30])
-            color = cfg.get("color", "#613583")
             text_color = self.config.get("buttons", {}).get("text_color", "#FFFFFF")
-            border_radius = 8 if cfg.get("shape", "") == "rounded" else 0
-            image_path = cfg.get("image_path", "")
             btn = QPushButton(symbol)
-            btn.setFont(self.app_font)
-            btn.setFixedSize(*size)
-            if image_path and os.path.isfile(image_path):
-                btn.setText("")
-                btn.setStyleSheet(f"background-color: {color}; border-radius: {border_radius}px; background-image: url({image_path}); background-repeat: no-repeat; background-position: center; border: none;")
-            else:
-                btn.setStyleSheet(f"background-color: {color}; color: {text_color}; border-radius: {border_radius}px;")
+            self._style_button(btn, symbol, cfg, "#613583", text_color)
             btn.clicked.connect(handler)
+            self.button_symbols[name] = symbol
             return btn
 
         time_layout = QHBoxLayout()
@@ -217,7 +345,84 @@ class MusicApp(QWidget):
         self.volume_label.setStyleSheet("background: transparent;")
 
         self.volume_slider = QSlider(Qt.Orientation.Horizontal)
+        self.volume_slider.setRange(0, 100)
+        self.volume_slider.setValue(70)
+        self.volume_slider.valueChanged.connect(self.on_volume_change)
+        self.apply_volume_style()
+
+        volume_layout.addWidget(self.volume_label)
+        volume_layout.addWidget(self.volume_slider)
+        main_layout.addLayout(volume_layout)
 
+# ----------------------------------------------------------------------------
+        # Emplacement du visualiseur, construit après le premier affichage
+        self.visualizer_slot = QWidget()
+        self.visualizer_slot.setStyleSheet("background: transparent;")
+        main_layout.addWidget(self.visualizer_slot)
+
+    def _style_button(self, btn, symbol, cfg, default_color, text_color):
+        size = cfg.get("size", [30, 30])
+        color = cfg.get("color", default_color)
+        border_radius = 8 if cfg.get("shape", "") == "rounded" else 0
+        image_path = cfg.get("image_path", "")
+        btn.setFont(self.app_font)
+        btn.setFixedSize(*size)
+        # Pixmap partagé et déjà à la taille du bouton, au lieu d'un
+        # background-image que Qt redécoderait pour chaque widget
+        if self._show_image(btn, image_path, size[0], size[1],
+                            lambda pixmap: btn.setIcon(QIcon(pixmap)), crop=True):
+            btn.setText("")
+            btn.setIconSize(QSize(*size))
+            btn.setStyleSheet(f"background-color: {color}; border-radius: {border_radius}px; border: none;")
+        else:
+            btn.setText(symbol)
+            btn.setIcon(QIcon())
+            btn.setStyleSheet(f"background-color: {color}; color: {text_color}; border-radius: {border_radius}px;")
+
+    def apply_button_styles(self):
+        """Police et boutons (section buttons), sans recréer les widgets."""
+        btn_cfg = self.config.get("buttons", {})
+        self.app_font = QFont(btn_cfg.get("font_family", "Arial"), btn_cfg.get("font_size", 14))
+        title_cfg = btn_cfg.get("rewind_backward", {})
+        for btn, symbol in self.title_buttons:
+            self._style_button(btn, symbol, title_cfg, "#ffffff", title_cfg.get("text_color", "#000000"))
+        text_color = btn_cfg.get("text_color", "#FFFFFF")
+        for name, symbol in self.button_symbols.items():
+            self._style_button(self.buttons[name], symbol, btn_cfg.get(name, {}), "#613583", text_color)
+        self.loop_btn_original_style = self.buttons["loop"].styleSheet()
+        # Même marque que on_toggle_loop
+        self._mark_loop_button()
+        for widget in (self.list_view, self.track_label, self.time_label, self.volume_label):
+            widget.setFont(self.app_font)
+
+    def apply_progress_style(self):
+        """Barre de progression et sélection de la playlist (section progress_bar)."""
+        pb_cfg = self.config.get("progress_bar", {})
+        chunk_color = pb_cfg.get("color", "#d09dd2")
+        bg_color = pb_cfg.get("background_color", "#350b4a")
+        radius = pb_cfg.get("radius", 10)
+        height = pb_cfg.get("height", 10)
+
+        self.list_view.setStyleSheet(f"""
+            QListView::item:selected {{
+                background: {bg_color};
+                color: white;
+            }}
+            QListView::item:selected:!active {{
+                background: {bg_color};
+                color: white;
+            }}
+        """)
+
+        # Forme d'onde de la piste dans la barre de progression
+        self.show_waveform = pb_cfg.get("waveform", True)
+        if self.show_waveform:
+            height = pb_cfg.get("waveform_height", max(height, 28))
+        self.progress_bar.set_style(chunk_color, bg_color, radius)
+        self.progress_bar.setFixedHeight(height)
+        self.progress_bar.setStyleSheet(f"QProgressBar {{background-color: {bg_color}; border-radius: {radius}px;}} QProgressBar::chunk {{background-color: {chunk_color}; border-radius: {radius}px;}}");
+
+    def apply_volume_style(self):
         vol_cfg = self.config.get("volume_bar", {})
         height = vol_cfg.get("height", 10)
         bg_color = vol_cfg.get("background_color", "#62a0ea")
@@ -225,11 +430,7 @@ class MusicApp(QWidget):
         slider_shape = vol_cfg.get("slider_shape", "rounded")
         radius = vol_cfg.get("radius", 5)
 
-        self.volume_slider.setRange(0, 100)
-        self.volume_slider.setValue(70)
-        self.volume_slider.valueChanged.connect(self.on_volume_change)
         self.volume_slider.setFixedHeight(height)
-
         border_radius = radius if slider_shape == "rounded" else 0
 
         style = f"""
@@ -247,61 +448,240 @@ class MusicApp(QWidget):
         """
         self.volume_slider.setStyleSheet(style)
 
-        volume_layout.addWidget(self.volume_label)
-        volume_layout.addWidget(self.volume_slider)
-        main_layout.addLayout(volume_layout)
+    def apply_playback_config(self):
+        pb_cfg = self.config.get("playback", {})
+        self.prefetch_ms = int(pb_cfg.get("prefetch_seconds", 10) * 1000)
+        # Normalisation : loudness mesurée en arrière-plan, appliquée au chargement
+        if pb_cfg.get("normalize", True):
+            actions.set_loudness_target(pb_cfg.get("loudness_target", -18.0))
+        else:
+            actions.set_loudness_target(None)
 
-# ----------------------------------------------------------------------------
-        self.visualizer = AudioVisualizer()
-        self.visualizer.configure(self.config)
-        main_layout.addWidget(self.visualizer)
+    def apply_debug_config(self):
+        debug_cfg = self.config.get("debug", {})
+        instrument.enable(instrument.requested(self.config))
+        self.hud.set_shown(instrument.enabled and debug_cfg.get("hud", False))
+
+    def dump_instrumentation(self):
+        """Relevé JSON et trace Chrome (chrome://tracing, Perfetto) à la fermeture."""
+        folder = self.config.get("debug", {}).get(
+            "trace_dir", os.path.join(os.getcwd(), "assets", "cache", "trace"))
+        try:
+            instrument.dump_json(os.path.join(folder, "spans.json"))
+            instrument.dump_chrome_trace(os.path.join(folder, "trace.json"))
+        except OSError as e:
+            print(f"Mesures non enregistrées : {e}")
+
+    def apply_config(self, config):
+        """
+        Applique une nouvelle configuration à chaud : seules les sections
+        modifiées sont refaites. La lecture (piste, position, son décodé)
+        n'est pas touchée.
+        """
+        changed = changed_sections(self.config, config)
+        if not changed:
+            return
+        # Copie : la fenêtre de configuration continue de modifier son dictionnaire
+        self.config = copy.deepcopy(config)
+        if "window" in changed:
+            self.apply_window_style()
+        if "buttons" in changed:
+            self.apply_button_styles()
+        if "progress_bar" in changed:
+            self.apply_progress_style()
+            if self.visualizer is not None:
+                self.visualizer.build_waveform = self.show_waveform
+            if self.show_waveform and self.loader is not None:
+                self.update_track_label()
+                if get_current_index() >= 0:
+                    # Piste déjà installée : sa forme d'onde n'a peut-être jamais été construite
+                    self.visualizer.ensure_waveform(playlist[get_current_index()])
+            elif not self.show_waveform:
+                self.progress_bar.set_track(None)
+        if "volume_bar" in changed:
+            self.apply_volume_style()
+        if "visualizer" in changed:
+            self.scheduler.max_fps = self.config.get("visualizer", {}).get("max_fps", 60)
+            if self.visualizer is not None:
+                self.visualizer.configure(self.config)
+            self.scheduler.refresh()
+        if "playback" in changed and self.loader is not None:
+            self.apply_playback_config()
+        if "debug" in changed:
+            self.apply_debug_config()
+
+    def _show_window(self, window):
+        if window.isMinimized():
+            window.showNormal()
+        window.show()
+        window.raise_()
+        window.activateWindow()
 
     def launch_config_ui(self):
-        subprocess.Popen([sys.executable, "config_ui.py"])
+        # Fenêtres construites au premier clic puis réutilisées, dans ce processus
+        if self.config_window is None:
+            from config_ui import ConfigUI
+            self.config_window = ConfigUI()
+            self.config_window.saved_signal.connect(self.apply_config)
+        self._show_window(self.config_window)
 
     def launch_research_ui(self):
-        subprocess.Popen([sys.executable, "research.py"])
+        if self.research_window is None:
+            from research import MP3DownloaderApp
+            self.research_window = MP3DownloaderApp(standalone=False)
+        self._show_window(self.research_window)
+
+    def bring_to_front(self):
+        self._show_window(self)
 
     def reload_app(self):
+        # Libère le nom de l'instance unique avant de lancer la suivante
+        if self.instance_guard is not None:
+            self.instance_guard.release()
         subprocess.Popen([sys.executable, "main.py"])
         QApplication.quit()
 
     def load_music(self):
-        music_dir = os.path.join(os.getcwd(), "assets", "music")
+        music_dir = self.music_dir
         os.makedirs(music_dir, exist_ok=True)
-        load_playlist_from_folder(music_dir)
-        self.list_widget.clear()
-        for path in playlist:
-            self.list_widget.addItem(os.path.basename(path))
+        start = 0
+        if self._snapshot is not None:
+            # Déjà affichée : on applique seulement les différences avec le dossier
+            self.playlist_model.sync_folder(music_dir, scan=False)
+            start = self._snapshot.get("current", 0)
+        else:
+            self.playlist_model.load_folder(music_dir, scan=False)
+        # L'index (durées, tags) est mis à jour en arrière-plan
+        self.library_scanner.request(list(playlist), prune=True)
         if playlist:
-            set_current_index(0)
-            load_track_by_index(0)
-            self.track_finished = False
-            self.list_widget.setCurrentRow(0)
-            self.update_track_label()
-            self.visualizer.load_audio(playlist[get_current_index()])
+            self.change_track(start if 0 <= start < len(playlist) else 0)
         else:
             self.track_label.setText("Aucune musique trouvée")
+        save_snapshot(music_dir, playlist, get_current_index())
+
+    def on_file_added(self, path):
+        i, inserted = self.playlist_model.add_path(path, scan=False)
+        self.library_scanner.request([path])
+        if inserted and get_current_index() == -1 and len(playlist) == 1:
+            self.change_track(i)
+        self.scheduler.refresh()
+
+    def on_file_removed(self, path):
+        self.download_cache.forget_path(path)
+        was_current = get_current_index() != -1 and playlist[get_current_index()] == path
+        queued = actions.queued_index
+        i = self.playlist_model.remove_path(path)
+        if i < 0:
+            return
+        if was_current:
+            self.replace_removed_track(i)
+        else:
+            self.shift_prefetch(i, queued)
+            self.update_track_label()
+        self.scheduler.refresh()
+
+    def shift_prefetch(self, row, queued):
+        """Ligne supprimée (autre que la piste en cours) : la piste préparée suit."""
+        if self._prefetch_target == -1 or row > self._prefetch_target:
+            return
+        if row < self._prefetch_target and self._prefetch_ready:
+            # Déjà en file du mixer (queued_index décalé par remove_track)
+            self._prefetch_target -= 1
+        else:
+            # Piste préparée supprimée, ou préparation en cours sous l'ancienne
+            # ligne : on refait la file du mixer et le préchargement
+            self.reset_prefetch(requeue=queued != -1)
+
+    def replace_removed_track(self, row):
+        """La piste en cours a été supprimée (mixer arrêté) : on passe à celle qui prend sa place."""
+        if playlist:
+            self.change_track(min(row, len(playlist) - 1))
+        else:
+            self.is_playing = False
+            self.buttons["play"].setText("➤")
+            self.track_label.setText("Aucune musique")
+
+    def on_file_renamed(self, old_path, new_path):
+        self.download_cache.rename_path(old_path, new_path)
+        i = self.playlist_model.rename_path(old_path, new_path)
+        if i < 0:
+            self.on_file_added(new_path)
+            return
+        if i == get_current_index():
+            self.update_track_label()
+
+    def watch_music_folder(self):
+        self.watcher = create_folder_watcher(self.music_dir, self)
+        self.watcher.added_signal.connect(self.on_file_added)
+        self.watcher.removed_signal.connect(self.on_file_removed)
+        self.watcher.renamed_signal.connect(self.on_file_renamed)
+        self.watcher.resync_signal.connect(self.resync_library)
+        self._watched_folder = folder_id(self.music_dir)
+
+    def rearm_folder_watcher(self):
+        # Le dossier de musique est revenu : nouvelle surveillance et rattrapage
+        if not os.path.isdir(self.music_dir):
+            return
+        self.folder_timer.stop()
+        self.watcher.deleteLater()
+        self.watch_music_folder()
+        self.resync_library()
+
+    def resync_library(self):
+        if folder_id(self.music_dir) != self._watched_folder:
+            # Dossier supprimé, déplacé ou recréé : la surveillance ne le suit
+            # plus. La playlist reste en l'état jusqu'à son retour
+            self.watcher.stop()
+            self.folder_timer.start()
+            return
+        # Événements perdus : on compare avec le dossier, la lecture continue
+        current = get_current_index()
+        queued = actions.queued_index
+        added, removed = self.playlist_model.sync_folder(self.music_dir, scan=False)
+        if current != -1 and get_current_index() == -1:
+            self.replace_removed_track(current)
+        elif added or removed:
+            if removed:
+                # Lignes décalées ou piste préparée disparue : on refait la file
+                self.reset_prefetch(requeue=queued != -1)
+            self.update_track_label()
+        self.library_scanner.request(list(playlist), prune=True)
+
+    def on_library_scanned(self, paths):
+        # Pistes indexées : leur loudness peut être mesurée
+        self.loudness_scanner.request(paths)
+        if actions.loaded_path in paths:
+            self.scheduler.refresh()
+
+    def on_loudness_measured(self, path, result):
+        if path == actions.loaded_path:
+            actions.refresh_track_gain()
 
     def update_track_label(self):
         name = get_current_track_name()
         self.track_label.setText(name or "Aucune musique")
-        try:
-            idx = playlist.index(os.path.join(os.getcwd(), "assets", "music", name))
-            self.list_widget.setCurrentRow(idx)
-        except ValueError:
-            pass
+        idx = get_current_index()
+        if idx >= 0:
+            self.list_view.setCurrentIndex(self.playlist_model.index(idx))
+        if self.show_waveform:
+            self.progress_bar.set_track(playlist[idx] if idx >= 0 else None)
 
     def update_progress(self):
+        """Texte, progression et fin de piste ; retourne le temps restant (ms) ou None."""
         pos = get_current_position_ms()
         dur = get_current_track_duration_ms()
         if dur > 0:
             self.progress_bar.setValue(int((pos / dur) * 1000))
             self.time_label.setText(f"{ms_to_mmss(pos)} / {ms_to_mmss(dur)}")
 
-            if pos >= dur - 500:
+            self.maybe_prefetch(pos, dur)
+            if self._prefetch_ready:
+                if pos >= dur:
+                    self.handoff_to_queued(dur)
+            elif pos >= dur - 500:
                 if self.is_looping:
                     seek_to_position(0)
+                    self.reset_prefetch()
                     pygame.mixer.music.play(loops=-1)
                     self.track_finished = False
                     self.is_playing = True
@@ -312,78 +692,200 @@ class MusicApp(QWidget):
                         self.on_skip()
             elif pos < dur - 1000:
                 self.track_finished = False
-        else:
-            self.progress_bar.setValue(0)
-            self.time_label.setText("00:00 / 00:00")
+            return dur - pos
+        self.progress_bar.setValue(0)
+        self.time_label.setText("00:00 / 00:00")
+        return None
 
-        self.visualizer.update_visualizer(pos)
+    def update_frame(self, steps):
+        if self.visualizer is not None:
+            self.visualizer.update_visualizer(get_current_position_ms(), steps)
 
     def progress_clicked(self, event):
+        # Avant la fin du démarrage différé, ni mixer ni chargeur
+        if self.loader is None:
+            return
         if event.button() == Qt.MouseButton.LeftButton:
             ratio = event.position().x() / self.progress_bar.width()
-            seek_to_position(int(get_current_track_duration_ms() * ratio))
+            ms = int(get_current_track_duration_ms() * ratio)
+            if self._loading:
+                # Le TrackLoader tient le mixer : le seek attend on_track_loaded
+                self._pending_seek = ms
+                return
+            seek_to_position(ms)
+            self.reset_prefetch()
+            self.scheduler.refresh()
 
     def select_track(self, index):
         i = index.row()
         if 0 <= i < len(playlist):
-            set_current_index(i)
-            load_track_by_index(i)
-            self.track_finished = False
+            self.change_track(i)
+
+    def change_track(self, i):
+        """
+        Met l'interface à jour tout de suite et confie le chargement au
+        TrackLoader ; un changement plus récent annule celui-ci.
+        """
+        if self.loader is None:
+            return
+        set_current_index(i)
+        self.track_finished = False
+        self.update_track_label()
+        self._loading = True
+        self._pending_seek = None
+        self.reset_prefetch()
+        self._load_started = instrument.now_ns()
+        self.loader.request(i, playlist[i])
+        self.scheduler.refresh()
+
+    def maybe_prefetch(self, pos, dur):
+        """
+        Dans les dernières secondes, prépare la piste suivante (ou la même
+        en mode boucle) puis la met en file d'attente du mixer.
+        """
+        if not self.is_playing or self._loading or not playlist:
+            return
+        if dur - pos > self.prefetch_ms or self._prefetch_target != -1:
+            return
+        current = get_current_index()
+        if current == -1:
+            return
+        target = current if self.is_looping else (current + 1) % len(playlist)
+        self._prefetch_target = target
+        self.prefetcher.request(target, playlist[target], with_visualizer=target != current)
+
+    def on_prefetched(self, generation, index, prepared):
+        if not self.prefetcher.is_current(generation) or index != self._prefetch_target:
+            if prepared is not None:
+                self.visualizer.discard_audio(prepared)
+            return
+        self._prefetched = prepared
+        queue_track(index)
+        self._prefetch_ready = True
+
+    def handoff_to_queued(self, dur):
+        # Le mixer a déjà enchaîné : on ne recharge rien, on recale l'état
+        index = actions.queued_index
+        prepared = self._prefetched
+        self._prefetched = None
+        self._prefetch_ready = False
+        self._prefetch_target = -1
+        if index == -1:
+            return
+        changed = index != get_current_index()
+        advance_to_queued(dur)
+        self.track_finished = False
+        if changed:
             self.update_track_label()
-            self.visualizer.load_audio(playlist[i])
-            if self.is_playing:
-                play_music()
+            if prepared is None:
+                from core.visualizer import PreparedAudio
+                prepared = PreparedAudio(playlist[index], self.visualizer.num_bars, None, None, None)
+            self.visualizer.attach_audio(prepared)
+
+    def reset_prefetch(self, requeue=False):
+        """requeue : la file du mixer est à refaire même si queued_index vaut -1."""
+        self.prefetcher.cancel()
+        if self._prefetched is not None:
+            self.visualizer.discard_audio(self._prefetched)
+        self._prefetched = None
+        self._prefetch_ready = False
+        self._prefetch_target = -1
+        if actions.queued_index == -1 and not requeue:
+            return
+        current = get_current_index()
+        if self._loading or current == -1:
+            # Le chargement en cours recharge le mixer, ce qui vide sa file
+            actions.queued_index = -1
+            return
+        # pygame ne sait pas vider sa file : on y remplace la piste par celle
+        # qui doit vraiment suivre, puis on prépare de nouveau ses données
+        target = current if self.is_looping else (current + 1) % len(playlist)
+        queue_track(target)
+        self._prefetch_target = target
+        self._prefetch_ready = True
+        self.prefetcher.request(target, playlist[target], with_visualizer=target != current)
+
+    def on_track_loaded(self, generation, index, prepared):
+        if not self.loader.is_current(generation):
+            self.visualizer.discard_audio(prepared)
+            return
+        self._loading = False
+        with instrument.span("track.attach"):
+            self.visualizer.attach_audio(prepared)
+        if instrument.enabled:
+            # Du clic (ou de l'enchaînement) à la piste prête
+            instrument.record("track.load", self._load_started, instrument.now_ns())
+        seek, self._pending_seek = self._pending_seek, None
+        if seek is not None:
+            seek_to_position(seek)
+        elif self.is_playing:
+            play_music()
+        if self.is_playing:
+            latency = self.loader.record_first_sound()
+            if latency is not None:
+                instrument.record_value("track.first_sound", latency)
+        self.scheduler.refresh()
+
+    def on_track_error(self, generation, message):
+        if self.loader.is_current(generation):
+            self._loading = False
+            self._pending_seek = None
+            self.track_label.setText(f"Erreur de chargement : {message}")
 
     def on_toggle_play_pause(self):
+        if self.loader is None:
+            return
         if self.is_playing:
             pause_music()
             self.is_playing = False
             self.buttons["play"].setText("➤")
+        elif self._loading:
+            # La lecture démarrera dès que la piste sera chargée
+            self.is_playing = True
+            self.buttons["play"].setText("❚❚")
         else:
             pos = get_current_position_ms()
             dur = get_current_track_duration_ms()
             if pos >= dur or pos == 0:
                 seek_to_position(0)
+                self.reset_prefetch()
                 pygame.mixer.music.play(loops=-1 if self.is_looping else 0)
             else:
                 play_music()
             self.is_playing = True
             self.buttons["play"].setText("❚❚")
+        self.scheduler.refresh()
 
     def on_skip_back(self):
-        i = (get_current_index() - 1) % len(playlist)
-        set_current_index(i)
-        load_track_by_index(i)
-        self.track_finished = False
-        self.update_track_label()
-        self.visualizer.load_audio(playlist[i])
-        if self.is_playing:
-            play_music()
+        if not playlist:
+            return
+        self.change_track((get_current_index() - 1) % len(playlist))
 
     def on_skip(self):
-        i = (get_current_index() + 1) % len(playlist)
-        set_current_index(i)
-        load_track_by_index(i)
-        self.track_finished = False
-        self.update_track_label()
-        self.visualizer.load_audio(playlist[i])
-        if self.is_playing:
-            play_music()
+        if not playlist:
+            return
+        self.change_track((get_current_index() + 1) % len(playlist))
 
     def on_toggle_loop(self):
         self.is_looping = not self.is_looping
-        btn = self.buttons["loop"]
-        original_size = btn.size()
-        if self.is_looping:
-            btn.setFixedSize(original_size.width() - 2, original_size.height() - 0)
-        else:
-            btn.setFixedSize(original_size.width() + 2, original_size.height() + 0)
+        # La piste à enchaîner change : on la préparera de nouveau
+        if self.loader is not None:
+            self.reset_prefetch()
+        self._mark_loop_button()
 
+    def _mark_loop_button(self):
+        # Taille absolue depuis la configuration : rien ne s'accumule au rechargement
+        width, height = self.config.get("buttons", {}).get("loop", {}).get("size", [30, 30])
+        if self.is_looping:
+            width -= 2
+        self.buttons["loop"].setFixedSize(width, height)
 
     def on_volume_change(self, value):
         volume_float = value / 100
-        set_volume(value / 100)
         self.volume_label.setText("" if value > 0 else "")
+        # Appliqué à la fin du démarrage différé, une fois le mixer ouvert
+        if self.loader is not None:
+            set_volume(value / 100)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -400,9 +902,181 @@ class MusicApp(QWidget):
     def mouseReleaseEvent(self, event):
         self._drag_pos = None
 
+    def closeEvent(self, event):
+        if self.loader is not None:
+            self.folder_timer.stop()
+            self.watcher.stop()
+            self.prefetcher.stop()
+            self.loader.stop()
+            self.library_scanner.stop()
+            self.loudness_scanner.stop()
+            self.config_watcher.stop()
+            save_snapshot(self.music_dir, playlist, get_current_index())
+        if self.research_window is not None:
+            self.research_window.queue.shutdown()
+            self.research_window.close()
+        if self.config_window is not None:
+            self.config_window.close()
+        if instrument.enabled:
+            self.dump_instrumentation()
+        super().closeEvent(event)
+
+
+class RemoteMusicApp(MusicApp):
+    """
+    Fenêtre en client léger du lecteur en arrière-plan (core.daemon) :
+    ni mixer, ni décodage, ni visualiseur dans ce processus. Les boutons
+    envoient des commandes par un thread dédié ; entre deux réponses du
+    démon, la position affichée est extrapolée localement.
+    """
+
+    # Intervalle minimal entre deux demandes d'état au démon
+    STATUS_INTERVAL_S = 0.25
+
+    def finish_startup(self):
+        from core.remote_worker import RemoteWorker
+        self._status = {}
+        self._status_time = 0.0
+        self._status_requested = 0.0
+        self._volume_synced = False
+        self.worker = RemoteWorker()
+        self.worker.reply_signal.connect(self._on_reply)
+        self.worker.error_signal.connect(self._on_remote_error)
+        self.worker.start()
+        self.worker.request("playlist")
+        self._request_status(force=True)
+        self.config_watcher = ConfigWatcher(CONFIG_PATH, self)
+        self.config_watcher.changed_signal.connect(self.apply_config)
+        # Lecture lancée ou arrêtée par un autre client (core.remote)
+        self.remote_timer = QTimer(self)
+        self.remote_timer.timeout.connect(self._poll)
+        self.remote_timer.start(1000)
+        self.profiler.mark("prêt")
+        self.profiler.report()
+
+    def apply_progress_style(self):
+        super().apply_progress_style()
+        if self.show_waveform:
+            # La forme d'onde demanderait de lire et décoder la piste ici
+            self.show_waveform = False
+            self.progress_bar.set_track(None)
+            self.progress_bar.setFixedHeight(self.config.get("progress_bar", {}).get("height", 10))
+
+    def _request_status(self, force=False):
+        now = time.monotonic()
+        if force or now - self._status_requested >= self.STATUS_INTERVAL_S:
+            self._status_requested = now
+            self.worker.request("status")
+
+    def _on_reply(self, cmd, reply):
+        if cmd == "playlist":
+            self.playlist_model.load_snapshot(reply["paths"])
+            self._status = {}
+            self._request_status(force=True)
+        elif "playing" in reply:
+            self._apply_status(reply)
+
+    def _on_remote_error(self, cmd, message):
+        self.is_playing = False
+        self.buttons["play"].setText("➤")
+        self.track_label.setText(f"Lecteur en arrière-plan injoignable : {message}")
+
+    def _apply_status(self, status):
+        self._status = status
+        self._status_time = time.monotonic()
+        if not self._volume_synced:
+            self._volume_synced = True
+            self.volume_slider.blockSignals(True)
+            self.volume_slider.setValue(round(status.get("volume", 0.7) * 100))
+            self.volume_slider.blockSignals(False)
+        if status["count"] != len(playlist):
+            self.worker.request("playlist")
+        if status["index"] != get_current_index():
+            set_current_index(status["index"])
+            self.update_track_label()
+        if status["playing"] != self.is_playing:
+            self.is_playing = status["playing"]
+            self.buttons["play"].setText("❚❚" if self.is_playing else "➤")
+        if status["looping"] != self.is_looping:
+            self.is_looping = status["looping"]
+            self._mark_loop_button()
+        self.scheduler.refresh()
+
+    def _command(self, cmd, **args):
+        if getattr(self, "worker", None) is not None:
+            self.worker.request(cmd, **args)
+
+    def _poll(self):
+        if not self.scheduler.text_timer.isActive():
+            self._request_status()
+
+    def update_progress(self):
+        # Jamais d'attente sur le démon ici : on relance une demande et on
+        # affiche la dernière réponse, avancée du temps écoulé
+        self._request_status()
+        if not self._status:
+            return None
+        pos = self._status["position_ms"]
+        dur = self._status["duration_ms"]
+        if self._status["playing"]:
+            pos += int((time.monotonic() - self._status_time) * 1000)
+        if dur > 0:
+            pos = min(pos, dur)
+            self.progress_bar.setValue(int((pos / dur) * 1000))
+            self.time_label.setText(f"{ms_to_mmss(pos)} / {ms_to_mmss(dur)}")
+            # Le démon enchaîne lui-même ; on relit l'état juste après
+            return max(dur - pos, 0)
+        self.progress_bar.setValue(0)
+        self.time_label.setText("00:00 / 00:00")
+        return None
+
+    def progress_clicked(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            ratio = event.position().x() / self.progress_bar.width()
+            self._command("seek", ms=int(self._status.get("duration_ms", 0) * ratio))
+
+    def change_track(self, i):
+        self._command("select", index=i)
+
+    def on_toggle_play_pause(self):
+        self._command("toggle")
+
+    def on_skip(self):
+        self._command("next")
+
+    def on_skip_back(self):
+        self._command("prev")
+
+    def on_toggle_loop(self):
+        self._command("loop")
+
+    def on_volume_change(self, value):
+        self.volume_label.setText("" if value > 0 else "")
+        self._command("volume", value=value / 100)
+
+    def closeEvent(self, event):
+        if getattr(self, "worker", None) is not None:
+            self.remote_timer.stop()
+            self.config_watcher.stop()
+            self.worker.stop()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
-    pygame.mixer.init()
     app = QApplication(sys.argv)
-    window = MusicApp()
+    guard = SingleInstance()
+    if guard.notify_running():
+        # Le lecteur tourne déjà : il vient de se mettre au premier plan
+        sys.exit(0)
+    if not guard.listen():
+        sys.exit(0)
+    # --attach (ou "playback": {"attach_daemon": true}) : si python -m core.daemon
+    # tourne, la fenêtre ne fait que le piloter
+    attach = "--attach" in sys.argv or load_config().get("playback", {}).get("attach_daemon", False)
+    if attach and daemon_running():
+        window = RemoteMusicApp()
+    else:
+        window = MusicApp()
+    window.instance_guard = guard
+    guard.activate_signal.connect(window.bring_to_front)
     sys.exit(app.exec())
@@ -2,12 +2,23 @@ import sys
 import os
 import json
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout,
-    QLineEdit, QPushButton, QLabel, QMessageBox
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout,
+    QLineEdit, QPushButton, QLabel, QMessageBox, QListWidget, QListWidgetItem
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
 from PyQt6.QtGui import QMovie
-import yt_dlp
+from core.download_cache import DownloadCache, default_cache_path, SEARCH_TTL_DAYS
+from core.downloads import (
+    DownloadQueue, STORAGE_MP3, QUEUED, RUNNING, DONE, ERROR, CANCELLED
+)
+
+STATUS_TEXT = {
+    QUEUED: "en attente",
+    RUNNING: "téléchargement",
+    DONE: "terminé",
+    ERROR: "erreur",
+    CANCELLED: "annulé",
+}
 
 # === lecture config.json ======
 def load_config(path="config.json"):
@@ -16,49 +27,41 @@ def load_config(path="config.json"):
             return json.load(f)
     return {}
 
-# === thread téléchargement =====
-class DownloadThread(QThread):
-    started_signal = pyqtSignal()
-    finished_signal = pyqtSignal(str)
-    error_signal = pyqtSignal(str)
-
-    def __init__(self, query: str, output_dir='assets/music'):
-        super().__init__()
-        self.query = query
-        self.output_dir = output_dir
-
-    def run(self):
-        try:
-            os.makedirs(self.output_dir, exist_ok=True)
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': os.path.join(self.output_dir, '%(title)s.%(ext)s'),
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-                'quiet': True,
-                'noplaylist': True,
-            }
-            self.started_signal.emit()
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([f"ytsearch1:{self.query}"])
-            self.finished_signal.emit("Téléchargement terminé.")
-        except Exception as e:
-            self.error_signal.emit(str(e))
+# === pont file -> interface =====
+class JobSignals(QObject):
+    # Les mises à jour arrivent des threads workers : on repasse par un signal Qt
+    updated = pyqtSignal(object)
 
 # === interface ===========
 class MP3DownloaderApp(QWidget):
-    def __init__(self):
+    def __init__(self, standalone=True):
         super().__init__()
+        # Ouverte depuis le lecteur : fermer la fenêtre la cache seulement,
+        # les téléchargements continuent jusqu'à la fermeture du lecteur
+        self.standalone = standalone
         self.config = load_config()
         self.setWindowTitle("Téléchargeur MP3 YouTube")
         win_cfg = self.config.get("window", {})
         self.setFixedSize(win_cfg.get("width", 400), win_cfg.get("height", 180))
         self.setStyleSheet(f"background-color: {win_cfg.get('background_color', '#222')};")
+        self.job_items = {}
         self.setup_ui()
 
+        dl_cfg = self.config.get("downloads", {})
+        self.signals = JobSignals()
+        self.signals.updated.connect(self.on_job_updated)
+        self.cache = DownloadCache(
+            default_cache_path('assets/music'),
+            ttl_days=dl_cfg.get("search_ttl_days", SEARCH_TTL_DAYS),
+        )
+        self.queue = DownloadQueue(
+            workers=dl_cfg.get("workers", 3),
+            retries=dl_cfg.get("retries", 2),
+            storage=dl_cfg.get("storage", STORAGE_MP3),
+            on_update=self.signals.updated.emit,
+            cache=self.cache,
+        )
+
     def setup_ui(self):
         layout = QVBoxLayout()
         layout.setSpacing(15)
@@ -76,6 +79,19 @@ class MP3DownloaderApp(QWidget):
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.status_label)
 
+        # === file de téléchargements =====
+        self.jobs_list = QListWidget()
+        layout.addWidget(self.jobs_list)
+
+        jobs_buttons = QHBoxLayout()
+        self.cancel_button = QPushButton("Annuler")
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        self.retry_button = QPushButton("Réessayer")
+        self.retry_button.clicked.connect(self.retry_selected)
+        jobs_buttons.addWidget(self.cancel_button)
+        jobs_buttons.addWidget(self.retry_button)
+        layout.addLayout(jobs_buttons)
+
         # === GIF loading =========
         self.loading_gif = QMovie("assets/gifs/load.gif")
         self.loading_label = QLabel()
@@ -92,31 +108,59 @@ class MP3DownloaderApp(QWidget):
             QMessageBox.warning(self, "Erreur", "Veuillez entrer un titre.")
             return
 
-        self.search_button.setEnabled(False)
-        self.status_label.setText("🔍 Recherche et téléchargement en cours...")
-
-        # animation gif
-        self.loading_label.setVisible(True)
-        self.loading_gif.start()
-
-        self.thread = DownloadThread(query)
-        self.thread.started_signal.connect(lambda: self.status_label.setText("Téléchargement..."))
-        self.thread.finished_signal.connect(self.on_finished)
-        self.thread.error_signal.connect(self.on_error)
-        self.thread.start()
-
-    def on_finished(self, message):
-        self.status_label.setText(message)
-        self.search_button.setEnabled(True)
-        self.loading_label.setVisible(False)
-        self.loading_gif.stop()
-
-    def on_error(self, error_msg):
-        self.status_label.setText("❌ Erreur lors du téléchargement.")
-        QMessageBox.critical(self, "Erreur", error_msg)
-        self.search_button.setEnabled(True)
-        self.loading_label.setVisible(False)
-        self.loading_gif.stop()
+        # Plusieurs recherches peuvent être en file : le bouton reste actif
+        self.search_input.clear()
+        self.queue.submit(query)
+
+    def selected_job_id(self):
+        item = self.jobs_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+    def cancel_selected(self):
+        job_id = self.selected_job_id()
+        if job_id is not None:
+            self.queue.cancel(job_id)
+
+    def retry_selected(self):
+        job_id = self.selected_job_id()
+        if job_id is not None:
+            self.queue.retry(job_id)
+
+    def on_job_updated(self, job):
+        item = self.job_items.get(job.id)
+        if item is None:
+            item = QListWidgetItem()
+            item.setData(Qt.ItemDataRole.UserRole, job.id)
+            self.jobs_list.addItem(item)
+            self.job_items[job.id] = item
+        text = f"{job.query} — {STATUS_TEXT[job.status]}"
+        if job.status == DONE and job.cached:
+            text += " (déjà présent)"
+        if job.status == RUNNING:
+            text += f" {int(job.progress * 100)} %"
+            if job.attempts > 1:
+                text += f" (essai {job.attempts})"
+        item.setText(text)
+        item.setToolTip(job.error)
+
+        running = sum(1 for j in self.queue.jobs.values() if j.status in (QUEUED, RUNNING))
+        if running:
+            self.status_label.setText(f"🔍 {running} téléchargement(s) en cours...")
+            if not self.loading_label.isVisible():
+                self.loading_label.setVisible(True)
+                self.loading_gif.start()
+        else:
+            self.status_label.setText("Téléchargement terminé.")
+            self.loading_label.setVisible(False)
+            self.loading_gif.stop()
+
+        if job.status == ERROR:
+            self.status_label.setText("❌ Erreur lors du téléchargement.")
+
+    def closeEvent(self, event):
+        if self.standalone:
+            self.queue.shutdown()
+        super().closeEvent(event)
 
 # === porte d’entrée ==============
 if __name__ == "__main__":